@@ -1,9 +1,21 @@
+import time
+_script_started = time.perf_counter()
+
 import streamlit as st
-from pymed import PubMed
-import pandas as pd
-import graphviz
-import matplotlib.pyplot as plt
-import numpy as np
+from startup import PROFILE, LazyModule, loaded_heavy_modules
+from pubmed_cache import PAGE_SIZE, PubMedCache
+from search_index import SearchIndex
+from charts import KineticsParams, render_biomarker_chart, render_lab_series
+from workflows import DONOR_WORKFLOW, RECIPIENT_WORKFLOW, to_dot, workflow_svg
+from content import ContentStore
+from evidence import EvidenceStore
+from digest import DigestStore, is_new, pubmed_url
+from i18n import LANGUAGES, translator
+import kdri
+import metrics
+
+# Heavy dependencies are only imported by the pages that use them (see startup.py).
+pd = LazyModule("pandas")
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
@@ -13,532 +25,579 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# --- LANGUAGE SETTINGS ---
-# Helper function for simple text switching
-def t(de, en):
-    if st.session_state.get('lang', 'Deutsch') == 'Deutsch':
-        return de
-    return en
-
-# --- EVIDENCE DATABASE (BILINGUAL) ---
-evidence_db = {
-    "heparin_donor": {
-        "DE": {"Aussage": "Systemische Heparinisierung (3000-5000 IE) vor Abklemmung verhindert Thrombosen.", "Evidenz": "Level 1b"},
-        "EN": {"Aussage": "Systemic heparinization (3000-5000 IU) prior to clamping prevents thrombosis.", "Evidenz": "Level 1b"},
-        "Quelle": "Cochrane Database Syst Rev. 2021; Pan et al."
-    },
-    "mannitol": {
-        "DE": {"Aussage": "Mannitol expandiert Volumen und fängt freie Radikale.", "Evidenz": "Level 2a"},
-        "EN": {"Aussage": "Mannitol expands volume and acts as a free radical scavenger.", "Evidenz": "Level 2a"},
-        "Quelle": "EAU Guidelines 2025"
-    },
-    "rakt_safety": {
-        "DE": {"Aussage": "RAKT reduziert Wundinfektionen bei adipösen Patienten (BMI >30) signifikant.", "Evidenz": "Level 2a"},
-        "EN": {"Aussage": "RAKT significantly reduces surgical site infections in obese patients (BMI >30).", "Evidenz": "Level 2a"},
-        "Quelle": "ERUS-RAKT Working Group; Breda et al."
-    },
-    "stapler_safety": {
-        "DE": {"Aussage": "Vascular Stapler sicherer als Clips für A. renalis.", "Evidenz": "Safety Alert"},
-        "EN": {"Aussage": "Vascular staplers are safer than clips for the renal artery.", "Evidenz": "Safety Alert"},
-        "Quelle": "FDA Warning / Friedman et al."
-    },
-    "machine_perfusion": {
-        "DE": {"Aussage": "HMP überlegen gegenüber statischer Kälte bei ECD-Spenden.", "Evidenz": "Level 1a"},
-        "EN": {"Aussage": "HMP is superior to static cold storage for ECD donations.", "Evidenz": "Level 1a"},
-        "Quelle": "COMPARE Trial (Lancet)"
-    },
-    "dd_cfdna": {
-        "DE": {"Aussage": "Früherkennung von Abstoßung durch dd-cfDNA.", "Evidenz": "Level 2b"},
-        "EN": {"Aussage": "Early detection of rejection via dd-cfDNA.", "Evidenz": "Level 2b"},
-        "Quelle": "Bloom et al."
-    },
-    "cardio_workup": {
-        "DE": {"Aussage": "Nicht-invasive Belastungstests alle 1-3 Jahre für asymptomatische Kandidaten auf Warteliste.", "Evidenz": "KDIGO 2020 / AHA"},
-        "EN": {"Aussage": "Non-invasive stress testing every 1-3 years for asymptomatic candidates on waitlist.", "Evidenz": "KDIGO 2020 / AHA"},
-        "Quelle": "Lentine et al. (Circulation 2012); KDIGO"
-    },
-    "dd_cfdna_kinetics": {
-        "DE": {"Aussage": "dd-cfDNA steigt 1-3 Monate VOR dem Kreatinin an (molekulare Schädigung).", "Evidenz": "Level 2a"},
-        "EN": {"Aussage": "dd-cfDNA rises 1-3 months BEFORE Creatinine (molecular injury).", "Evidenz": "Level 2a"},
-        "Quelle": "Bloom et al. (JASN)"
-    },
-    "icg_ureter": {
-        "DE": {"Aussage": "ICG sichert Ureterdurchblutung und verhindert Stenosen.", "Evidenz": "Level 2b"},
-        "EN": {"Aussage": "ICG confirms ureteral perfusion and prevents stenosis.", "Evidenz": "Level 2b"},
-        "Quelle": "Vignolini et al."
-    }
-}
-
 # --- HELPER FUNCTIONS ---
+@st.cache_resource
+def get_evidence_store():
+    """Evidence entries and their indexes, loaded once per process."""
+    return EvidenceStore()
+
+@metrics.timer("evidence_badge_seconds")
 def get_evidence_badge(key):
-    lang_key = st.session_state.get('lang', 'Deutsch')
-    lang_code = "DE" if lang_key == "Deutsch" else "EN"
-    
-    data = evidence_db.get(key)
+    data = get_evidence_store().get(key)
     if data:
-        content = data[lang_code]
-        if "Alert" in content['Evidenz']:
-            st.error(f"🛑 **Safety:** {content['Aussage']} ({data['Quelle']})")
+        statement = tr(f"evidence.{key}")
+        if "Alert" in data['Evidenz']:
+            st.error(f"🛑 **{tr('evidence.safety')}:** {statement} ({data['Quelle']})")
         else:
-            st.info(f"📚 **Evidenz/Evidence:** {content['Aussage']}\n\n*Ref: {data['Quelle']} ({content['Evidenz']})*")
-
-def fetch_pubmed_data(query):
-    try:
-        pubmed = PubMed(tool="StreamlitApp", email="mail@example.com")
-        results = pubmed.query(query, max_results=3)
-        return [{"Titel": r.title, "Abstract": r.abstract, "Date": r.publication_date} for r in results]
-    except:
-        return []
-
-def render_biomarker_chart():
-    """Generates a matplotlib chart comparing Creatinine vs dd-cfDNA kinetics"""
-    t_axis = np.linspace(-3, 3, 100) # Time in months relative to diagnosis
-    
-    # Simulate Kinetics
-    # Creatinine: Stays low, rises drastically at t=0 (Clinical Rejection)
-    creatinine = 1.0 + 2.0 * (1 / (1 + np.exp(-5 * (t_axis - 0.2)))) 
-    
-    # dd-cfDNA: Rises early (t = -1.5), peaks at t=0, then drops with treatment
-    dd_cfdna = 0.2 + 3.0 * np.exp(-((t_axis + 0.5)**2) / 1.5) 
-    
-    fig, ax1 = plt.subplots(figsize=(8, 4))
-    
-    # Plot Creatinine (Blue, Right Axis usually, but we keep same axis for trend viz)
-    color = 'tab:blue'
-    ax1.set_xlabel('Zeit (Monate) / Time (Months)')
-    ax1.set_ylabel('Serum Kreatinin (mg/dl)', color=color)
-    ax1.plot(t_axis, creatinine, color=color, linewidth=3, label='Creatinine (Function)')
-    ax1.tick_params(axis='y', labelcolor=color)
-    ax1.grid(True, alpha=0.3)
-
-    # Instantiate a second axes that shares the same x-axis
-    ax2 = ax1.twinx()  
-    color = 'tab:red'
-    ax2.set_ylabel('dd-cfDNA (%)', color=color)  
-    ax2.plot(t_axis, dd_cfdna, color=color, linestyle='--', linewidth=3, label='dd-cfDNA (Injury)')
-    ax2.tick_params(axis='y', labelcolor=color)
-
-    # Annotation
-    plt.title("Biomarker Kinetics: Injury (DNA) vs. Function (Creatinine)")
-    plt.axvline(x=0, color='gray', linestyle=':', label='Clinical Diagnosis')
-    
-    # Highlight Lead Time
-    ax2.annotate('Lead Time\n(1-3 Months)', xy=(-1, 1.5), xytext=(-2.5, 2.0),
-                 arrowprops=dict(facecolor='black', shrink=0.05))
-    
-    return fig
+            st.info(f"📚 **{tr('evidence.label')}:** {statement}\n\n*Ref: {data['Quelle']} ({data['Evidenz']})*")
+
+@st.cache_resource
+def get_content_store():
+    """Content tables loaded once per process; sessions get copy-on-write views of the shared frames."""
+    return ContentStore()
+
+def get_table(table_id, lang):
+    return get_content_store().get(table_id, lang)
+
+@st.cache_resource
+def get_digest_store():
+    """Dashboard digest written by the background sync (digest.py); read-only, no network."""
+    return DigestStore()
+
+@st.cache_resource
+def get_search_index():
+    """Local full-text index of every fetched article, shared by all sessions."""
+    return SearchIndex()
+
+@st.cache_resource
+def get_pubmed_cache():
+    """One on-disk PubMed cache per process, shared by all sessions."""
+    return PubMedCache(on_records=get_search_index().add)
+
+@st.cache_resource
+def get_hla_panel():
+    """Reference donor panel for cPRA (NTX_HLA_PANEL or synthetic), built once per process."""
+    import crossmatch
+    return crossmatch.load_panel()
+
+@st.cache_resource
+def get_kdri_model():
+    """KDRI/KDPI coefficients compiled once; the donor form and registry uploads share them."""
+    return kdri.KdriModel()
+
+def stream_pubmed_data(query, start=0, limit=PAGE_SIZE):
+    """PubMed records from ``start`` on, one cached page at a time."""
+    return get_pubmed_cache().stream(query, start=start, limit=limit)
+
+def show_article(record):
+    st.write(f"**{record['Titel']}** ({record['Date']})")
+    st.caption(record['Abstract'])
+    st.markdown("---")
 
 # --- GRAPHVIZ WORKFLOWS (BILINGUAL) ---
 
-def render_donor_workflow(lang):
-    """SPENDER Workflow (RDN)"""
-    is_de = lang == "Deutsch"
-    dot = graphviz.Digraph(comment='RDN')
-    dot.attr(rankdir='TB', size='8')
-    dot.attr('node', shape='box', style='filled', fillcolor='#e8f5e9') # Green tint
-    
-    dot.node('A', '1. Lagerung (60°)' if is_de else '1. Positioning (60°)')
-    dot.node('B', '2. Präparation (Hilus)' if is_de else '2. Dissection (Hilus)')
-    dot.node('C', '3. PHARMA BOLUS\n(Heparin/Mannitol)', fillcolor='#ff8a80', style='bold')
-    dot.node('D', '4. ICG Check (Ureter)', fillcolor='#fff9c4')
-    dot.node('E', '5. Stapling (Arterie)' if is_de else '5. Stapling (Artery)')
-    dot.node('F', '6. Extraktion (Pfannenstiel)' if is_de else '6. Extraction (Pfannenstiel)')
-    
-    dot.edge('A', 'B')
-    dot.edge('B', 'C', label=' 3-5 min vor/pre Clip')
-    dot.edge('C', 'D')
-    dot.edge('D', 'E', label=' Safety View')
-    dot.edge('E', 'F', label=' Warm Ischemia Start')
-    return dot
-
-def render_recipient_workflow(lang):
-    """EMPFÄNGER Workflow (RAKT)"""
-    is_de = lang == "Deutsch"
-    dot = graphviz.Digraph(comment='RAKT')
-    dot.attr(rankdir='TB', size='8')
-    dot.attr('node', shape='box', style='filled', fillcolor='#e3f2fd') # Blue tint
-
-    dot.node('1', '1. Zugang' if is_de else '1. Access (Pfannenstiel)')
-    dot.node('2', '2. Gefäß-Exposure' if is_de else '2. Vessel Exposure')
-    dot.node('3', '3. Niere Andocken' if is_de else '3. Docking Kidney')
-    dot.node('4', '4. Regionale Hypothermie' if is_de else '4. Regional Hypothermia', fillcolor='#b3e5fc')
-    dot.node('5', '5. Anastomosen' if is_de else '5. Anastomosis')
-    dot.node('6', '6. REPERFUSIONS-BOLUS', fillcolor='#ff8a80', style='bold')
-    dot.node('7', '7. Freigabe & ICG' if is_de else '7. Unclamp & ICG')
-    dot.node('8', '8. Ureter-Implantation' if is_de else '8. Ureter Reimplantation')
-
-    dot.edge('1', '2')
-    dot.edge('2', '3')
-    dot.edge('3', '4', label=' Time critical')
-    dot.edge('4', '5')
-    dot.edge('5', '6', label=' Pre-Unclamp')
-    dot.edge('6', '7')
-    dot.edge('7', '8')
-    return dot
+def render_workflow(spec, lang):
+    """Shows a workflow spec as precompiled SVG (client-side layout if Graphviz is missing)."""
+    with metrics.timer("workflow_render_seconds", workflow=spec["id"]):
+        svg = workflow_svg(spec, lang)
+        if svg is None:
+            st.graphviz_chart(to_dot(spec, lang))
+        else:
+            st.image(svg.decode("utf-8"), width="stretch")
+
+SIM_PROCEDURES = 200_000
+
+@st.cache_data(show_spinner=False)
+def simulate_ischemia(n):
+    """Paired RDN/RAKT Monte Carlo for every recipient start offset, computed once per process."""
+    import ischemia
+    return ischemia.summarize(ischemia.simulate(n, workers=1))
+
+def show_ischemia(workflow_id):
+    """Simulated step intervals of one workflow tab; RAKT compares the recipient start offsets."""
+    import ischemia
+    intervals = [i for i in ischemia.load_timing()["intervals"]
+                 if workflow_id in ischemia.interval_workflows(i)
+                 and (workflow_id != "rdn" or ischemia.interval_workflows(i) == {"rdn"})]
+    labels = {i["id"]: i["label"].get(current_lang, i["label"]["English"]) for i in intervals}
+    rows = [r for r in simulate_ischemia(SIM_PROCEDURES) if r["interval"] in labels]
+    with st.expander(tr("sim.expander")):
+        st.caption(tr("sim.help").format(n=SIM_PROCEDURES))
+        if workflow_id == "rdn":
+            # Donor times do not depend on when the recipient OR starts.
+            first = rows[0]["offset"]
+            st.table(pd.DataFrame([
+                {tr("sim.interval"): labels[r["interval"]], "P5": r["p5"], "P50": r["p50"], "P95": r["p95"],
+                 tr("sim.in_target"): f"{r['in_target']:.0%}" if r["in_target"] is not None else ""}
+                for r in rows if r["offset"] == first]).round(1))
+        else:
+            table = {}
+            for r in rows:
+                table.setdefault(r["offset"], {tr("sim.offset"): f"{r['offset']:.0f}"})[labels[r["interval"]]] = \
+                    f"{r['p50']:.0f} ({r['p95']:.0f})"
+            st.caption(tr("sim.median_p95"))
+            st.table(pd.DataFrame(list(table.values())))
 
 # --- SIDEBAR NAVIGATION ---
 st.sidebar.title("NTX Sidebar")
+# Pre-rendered static pages (prerender.py) link into the live app as ?lang=<code>&page=<key>.
+query = st.query_params
+lang_codes = list(LANGUAGES.values())
 # Language Selector
-st.session_state['lang'] = st.sidebar.selectbox("Language / Sprache", ["Deutsch", "English"])
+st.session_state['lang'] = st.sidebar.selectbox(
+    "Language / Sprache", list(LANGUAGES),
+    index=lang_codes.index(query["lang"]) if query.get("lang") in lang_codes else 0)
 current_lang = st.session_state['lang']
+# Translator bound to this session's language; each lookup is a single dict access.
+tr = translator(current_lang)
 
 # Define navigation options based on language
 nav_options = {
-    "Dashboard": "Dashboard (News)",
-    "Prep": "1. Preparation (Evaluation)",
-    "Deceased": "2. Deceased Donor" if current_lang == "English" else "2. Leichenspende",
-    "Living": "3. Living Donor (RDN)" if current_lang == "English" else "3. Lebendspende (RDN)",
-    "Recipient": "4. Recipient Surgery (RAKT)" if current_lang == "English" else "4. Empfänger (RAKT)",
-    "FollowUp": "5. Follow-Up & Guidelines",
-    "Search": "6. Search (PubMed)"
+    "Dashboard": tr("nav.dashboard"),
+    "Prep": tr("nav.prep"),
+    "Deceased": tr("nav.deceased"),
+    "Living": tr("nav.living"),
+    "Recipient": tr("nav.recipient"),
+    "FollowUp": tr("nav.followup"),
+    "Search": tr("nav.search")
 }
 
-nav_selection = st.sidebar.radio("Navigation", list(nav_options.values()))
+nav_selection = st.sidebar.radio(
+    "Navigation", list(nav_options.values()),
+    index=list(nav_options).index(query["page"]) if query.get("page") in nav_options else 0)
+page_key = next(key for key, label in nav_options.items() if label == nav_selection)
+_page_started = time.perf_counter()
 
 # --- CONTENT ---
 
 # === DASHBOARD ===
 if nav_selection == nav_options["Dashboard"]:
-    st.title(t("Nierentransplantation: Update", "Kidney Transplantation: Update"))
-    st.markdown(t("### Was gibt es neues?", "### What's New?"))
+    st.title(tr("dashboard.title"))
+    st.markdown(tr("dashboard.whats_new"))
     
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.success("🤖 **Robotik (RAKT)**")
-        st.write(t("Standard für BMI > 30. Reduziert Wundinfektionen.", "Standard for BMI > 30. Reduces SSI."))
-    with col2:
-        st.info("❄️ **Maschinenperfusion**")
-        st.write(t("HMP ist neuer Standard für ECD-Nieren.", "HMP is the new standard for ECD kidneys."))
-    with col3:
-        st.warning("🧬 **Biomarker**")
-        st.write(t("dd-cfDNA ersetzt Biopsien.", "dd-cfDNA replaces biopsies."))
+    digest = get_digest_store()
+    for col, topic in zip(st.columns(len(digest.topics)), digest.topics):
+        with col:
+            getattr(st, topic["style"])(topic["title"])
+            st.write(tr(topic["summary"]))
+            entry = digest.get(topic["id"])
+            for article in entry["articles"][:3] if entry else []:
+                title = article["Titel"].replace("[", "(").replace("]", ")")
+                st.markdown(f"{'🆕 ' if is_new(article) else ''}[{title}]({pubmed_url(article['PMID'])}) · {article['Date']}")
+    if digest.synced_at:
+        st.caption(tr("dashboard.digest_synced").format(date=digest.synced_at[:10]))
 
 # === 1. PREPARATION (EXPANDED) ===
 elif nav_selection == nav_options["Prep"]:
-    st.title(t("Patientenvorbereitung & Maintenance", "Patient Preparation & Maintenance"))
+    st.title(tr("prep.title"))
     
     tab1, tab2, tab3 = st.tabs([
-        t("Workup Matrix (Tabelle)", "Workup Matrix (Table)"), 
-        t("Kardiovaskulärer Fokus", "Cardiovascular Focus"),
-        t("Immunologie", "Immunology")
+        tr("prep.tab_workup"), 
+        tr("prep.tab_cardio"),
+        tr("prep.tab_immunology")
     ])
     
     with tab1:
-        st.subheader(t("Wartelisten-Maintenance: Was verfällt wann?", "Waitlist Maintenance: What expires when?"))
-        st.info(t(
-            "Patienten auf der Warteliste müssen 'transplantabel' bleiben. Abgelaufene Untersuchungen führen zur temporären Sperre (NT-Status).",
-            "Patients on the waitlist must remain 'transplantable'. Expired exams lead to temporary suspension (NT status)."
-        ))
+        st.subheader(tr("prep.waitlist_header"))
+        st.info(tr("prep.waitlist_info"))
         
         # Detailed Clinical Workup Data
-        if current_lang == "Deutsch":
-            workup_data = {
-                "Bereich": ["Labor/Virologie", "Labor/Virologie", "Kardiovaskulär", "Kardiovaskulär", "Bildgebung", "Bildgebung", "Vorsorge"],
-                "Untersuchung": ["HIV, HCV, HBV (PCR)", "CMV, EBV, VZV (IgG/IgM)", "EKG + TTE (Echo)", "Stress-Test (Dobutamin/Ergo)", "Röntgen Thorax", "Abdomen Sono (Nieren/Leber)", "Tumorscreening (Gyn/Uro/Haut)"],
-                "Gültigkeit (Update)": ["3 Monate (bzw. akut vor TX)", "Einmalig (außer Status ändert sich)", "12 Monate", "12-24 Monate (je nach Risiko)", "12 Monate", "12 Monate", "12 Monate (Altersabhängig)"],
-                "Kommentar": ["Entscheidend für High-Urgency", "Bestimmt Prophylaxe (Valcyte)", "EF < 30% ist Kontraindikation", "Bei Diabetikern/KHK zwingend", "Infektfokus ausschließen", "Steine/Tumore ausschließen", "Nach Tumorfreiheit (Warnecke-Kriterien)"]
-            }
-        else:
-            workup_data = {
-                "Category": ["Labs/Virology", "Labs/Virology", "Cardiovascular", "Cardiovascular", "Imaging", "Imaging", "Screening"],
-                "Exam": ["HIV, HCV, HBV (PCR)", "CMV, EBV, VZV (IgG/IgM)", "ECG + TTE (Echo)", "Stress Test (Dobutamine/Ergo)", "CXR (Chest X-Ray)", "Abd. Ultrasound", "Cancer Screening (Gyn/Uro/Skin)"],
-                "Validity (Update)": ["3 Months (or pre-Tx)", "Once (unless seroconversion)", "12 Months", "12-24 Months (Risk dependent)", "12 Months", "12 Months", "12 Months (Age dependent)"],
-                "Comment": ["Crucial for High-Urgency", "Determines Prophylaxis", "EF < 30% is contraindication", "Mandatory for Diabetics/CAD", "Rule out infection", "Rule out stones/masses", "Wait times apply (Warnecke)"]
-            }
-        
-        df_workup = pd.DataFrame(workup_data)
+        df_workup = get_table("workup", current_lang)
         st.dataframe(df_workup, use_container_width=True)
 
+        # Cohort check: which listed patients have expired or soon-due exams
+        with st.expander(tr("prep.cohort_expander")):
+            import waitlist
+            rules = waitlist.load_rules()
+            labels = {r["id"]: r["label"].get(current_lang, r["label"]["English"]) for r in rules}
+            st.caption(tr("prep.cohort_help").format(exams=", ".join(f"`{exam}`" for exam in labels)))
+            uploaded = st.file_uploader(tr("prep.cohort_upload"), type=["csv", "parquet"])
+            col_w1, col_w2 = st.columns(2)
+            as_of = col_w1.date_input(tr("prep.cohort_as_of"))
+            due_days = col_w2.number_input(tr("prep.cohort_due_days"), 0, 365, 30)
+            if uploaded is not None:
+                try:
+                    summary = waitlist.evaluate_file(uploaded, as_of, due_days, rules)
+                except ValueError as exc:
+                    st.error(str(exc))
+                else:
+                    st.write(tr("prep.cohort_summary").format(patients=summary["patients"], nt=summary["nt"]))
+                    st.table(pd.DataFrame(
+                        [{tr("prep.cohort_exam"): labels[exam], **{tr(f"status.{name}"): n for name, n in counts.items()}}
+                         for exam, counts in summary["exams"].items()]))
+                    if summary["nt_patients"]:
+                        st.caption(tr("prep.cohort_nt_list"))
+                        st.write(", ".join(str(pid) for pid in summary["nt_patients"]))
+
         # --- WARNECKE CRITERIA SECTION ---
         st.markdown("---")
-        with st.expander(t("⏳ Onkologische Wartezeiten (Warnecke Kriterien)", "⏳ Oncology Wait Times (Warnecke Criteria)")):
-            st.markdown(t(
-                "Mindestwartezeit nach kurativer Tumorbehandlung bis zur Listung (Eurotransplant Empfehlung):",
-                "Minimum waiting time after curative tumor treatment before listing (Eurotransplant Recommendation):"
-            ))
+        with st.expander(tr("prep.warnecke_expander")):
+            st.markdown(tr("prep.warnecke_intro"))
             
-            if current_lang == "Deutsch":
-                warnecke_data = {
-                    "Tumor-Entität": ["Nierenzellkarzinom (Inzidentell, klein)", "Nierenzellkarzinom (Symptomatisch)", "Blasenkarzinom (Nicht-invasiv)", "Blasenkarzinom (Invasiv)", "Prostatakarzinom (Low Risk)", "Mamma-Karzinom", "Kolorektales Karzinom", "Melanom"],
-                    "Wartezeit": ["0 Jahre (Sofort)", "2 Jahre", "0 Jahre", "2-5 Jahre", "0 Jahre (Active Surveillance)", "2-5 Jahre (Stadienabhängig)", "2 Jahre", "mehr als 5 Jahre"]
-                }
-            else:
-                 warnecke_data = {
-                    "Tumor Entity": ["RCC (Incidental, small)", "RCC (Symptomatic)", "Bladder Cancer (Non-invasive)", "Bladder Cancer (Invasive)", "Prostate Cancer (Low Risk)", "Breast Cancer", "Colorectal Cancer", "Melanoma"],
-                    "Wait Time": ["0 Years (Immediate)", "2 Years", "0 Years", "2-5 Years", "0 Years (Active Surveillance)", "2-5 Years (Stage dependent)", "2 Years", "more than 5 Years"]
-                }
-            st.table(pd.DataFrame(warnecke_data))
+            st.table(get_table("warnecke", current_lang))
+
+            import warnecke
+            rule_table = warnecke.RuleTable()
+            st.caption(tr("prep.warnecke_help").format(entities=", ".join(f"`{e}`" for e in rule_table.entities)))
+            candidates = st.file_uploader(tr("prep.warnecke_upload"), type=["csv", "parquet"])
+            listing_date = st.date_input(tr("prep.cohort_as_of"), key="warnecke_as_of")
+            if candidates is not None:
+                try:
+                    summary = warnecke.evaluate_file(candidates, listing_date, rule_table)
+                except ValueError as exc:
+                    st.error(str(exc))
+                else:
+                    st.write(tr("prep.warnecke_summary").format(candidates=summary["candidates"]))
+                    st.table(pd.DataFrame([{tr(f"status.{name}"): summary[name] for name in warnecke.STATUS_NAMES.values()}]))
         # ---------------------------------
 
     with tab2:
-        st.subheader(t("Kardiovaskuläres Risiko-Management", "Cardiovascular Risk Management"))
-        st.write(t(
-            "Kardiovaskuläre Ereignisse sind die häufigste Todesursache nach NTX. Ein striktes Screening ist essenziell.",
-            "CV events are the leading cause of death post-KTx. Strict screening is essential."
-        ))
+        st.subheader(tr("prep.cardio_header"))
+        st.write(tr("prep.cardio_intro"))
         get_evidence_badge("cardio_workup")
         
-        st.markdown(t("#### Algorithmus: Wann Herzkatheter (Coro)?", "#### Algorithm: When Angiography?"))
+        st.markdown(tr("prep.angio_algorithm"))
         col_c1, col_c2 = st.columns(2)
         with col_c1:
-            st.error(t("**Indikation zur Angio:**", "**Indication for Angio:**"))
+            st.error(tr("prep.angio_indication"))
             st.write("- Pathologischer Stress-Test")
             st.write("- Bekannte KHK / Stents")
             st.write("- Diabetes + >50 Jahre + Raucher (High Risk)")
         with col_c2:
-            st.success(t("**Keine Angio nötig wenn:**", "**No Angio needed if:**"))
+            st.success(tr("prep.angio_not_needed"))
             st.write("- Belastbarkeit > 100 Watt (asymptomatisch)")
             st.write("- Stress-Echo unauffällig")
             st.write("- Keine kardialen Vorerkrankungen")
 
     with tab3:
-        st.subheader(t("Immunologie (HLA)", "Immunology (HLA)"))
+        st.subheader(tr("prep.immunology_header"))
         st.write("• **HLA-A/B/C/DR/DQ/DP:** High-Res Typisierung.")
-        st.write("• **PRA (Panel Reactive Antibodies):** " + t("Update alle 3 Monate nötig für Eurotransplant.", "Update every 3 months required for Eurotransplant."))
-        st.write("• **Virtuelles Crossmatch:** " + t("Ersetzt physisches XM.", "Replaces physical XM."))
+        st.write("• **PRA (Panel Reactive Antibodies):** " + tr("prep.pra_update"))
+        st.write("• **Virtuelles Crossmatch:** " + tr("prep.virtual_xm"))
+
+        # Waitlist crossmatch: one engine per uploaded list and session, antibody updates applied once each
+        with st.expander(tr("prep.xm_expander")):
+            try:
+                panel = get_hla_panel()
+            except ValueError as exc:
+                # A misconfigured NTX_HLA_PANEL only disables this section, not the page.
+                panel, waitlist_file = None, None
+                st.error(str(exc))
+            if panel is not None:
+                st.caption(tr("prep.xm_help").format(donors=panel.donors))
+                waitlist_file = st.file_uploader(tr("prep.xm_upload"), type=["csv", "parquet"], key="xm_waitlist")
+            if waitlist_file is not None:
+                import crossmatch
+                try:
+                    if st.session_state.get("xm_file") != waitlist_file.file_id:
+                        engine = crossmatch.CrossmatchEngine(panel.table, panel)
+                        waitlist_file.seek(0)
+                        engine.load_file(waitlist_file)
+                        st.session_state.update(xm_file=waitlist_file.file_id, xm_engine=engine, xm_updates=set())
+                    engine = st.session_state["xm_engine"]
+                    update_file = st.file_uploader(tr("prep.xm_update"), type=["csv", "parquet"], key="xm_update")
+                    if update_file is not None and update_file.file_id not in st.session_state["xm_updates"]:
+                        update_file.seek(0)
+                        changed = engine.load_file(update_file)
+                        st.session_state["xm_updates"].add(update_file.file_id)
+                        st.success(tr("prep.xm_updated").format(changed=changed))
+                except ValueError as exc:
+                    st.error(str(exc))
+                else:
+                    st.write(tr("prep.xm_summary").format(candidates=engine.patients))
+                    st.table(pd.DataFrame([engine.cpra_bands()], index=[tr("prep.xm_band")]))
+                    typing = st.text_input(tr("prep.xm_donor"), placeholder="A2 A24 B7 B44 Cw7 Cw5 DR15 DR4 DQ6 DQ8 DP4")
+                    if typing:
+                        try:
+                            negative = engine.negative(typing)
+                        except ValueError as exc:
+                            st.error(str(exc))
+                        else:
+                            st.write(tr("prep.xm_result").format(negative=len(negative), positive=engine.patients - len(negative)))
+                            st.dataframe(negative, use_container_width=True)
 
 # === 2. DECEASED DONOR ===
 elif nav_selection == nav_options["Deceased"]:
-    st.title(t("Postmortale Spende (DBD / DCD)", "Deceased Donor (DBD / DCD)"))
-    st.markdown(t("Prozesse von der Entnahme bis zur Implantation.", "Processes from retrieval to implantation."))
+    st.title(tr("deceased.title"))
+    st.markdown(tr("deceased.subtitle"))
     
     col_proc, col_evid = st.columns([2, 1])
     
     with col_proc:
-        st.subheader(t("Ablauf & Perfusion", "Workflow & Perfusion"))
+        st.subheader(tr("deceased.workflow_header"))
         
-        st.markdown(t(
-            """
-            1.  **Explantation:** En-bloc Entnahme der Nieren inkl. Aorta/Vena Cava Patch.
-            2.  **Perfusion:** Sofortige Spülung mit 4°C kalter Lösung (z.B. HTK).
-            3.  **Lagerung:** Entscheidung Statisch vs. Maschine.
-            """,
-            """
-            1.  **Explantation:** En-bloc extraction including Aorta/Vena Cava patch.
-            2.  **Perfusion:** Immediate flush with 4°C solution (e.g., HTK).
-            3.  **Storage:** Decision Static vs. Machine.
-            """
-        ))
+        st.markdown(tr("deceased.process_steps"))
         
         st.markdown("---")
         st.markdown("")
         st.markdown("---")
 
-        st.markdown(t("#### Workflow: Back-Table Präparation", "#### Workflow: Back-Table Preparation"))
+        st.markdown(tr("deceased.backtable_header"))
         
         # Visualisierung Backtable
-        st.code(t(
-            """
-            1. Trennung der Nieren (Split)
-            2. Entfettung des Hilus (Vorsicht: Ureter-Vaskularisation!)
-            3. Ligatur kleiner Seitenäste (Hemo-Clips)
-            4. Biopsie (bei marginalen Spendern)
-            """,
-            """
-            1. Splitting the kidneys
-            2. Hilar defatting (Caution: Ureter vascularity!)
-            3. Ligation of small branches (Hemo-clips)
-            4. Biopsy (for marginal donors)
-            """
-        ), language="text")
+        st.code(tr("deceased.backtable_steps"), language="text")
         
         st.markdown("")
 
     with col_evid:
-        st.subheader(t("🔬 Evidenz-Check", "🔬 Evidence Check"))
-        st.write(t("Warum Maschinenperfusion?", "Why Machine Perfusion?"))
+        st.subheader(tr("deceased.evidence_check"))
+        st.write(tr("deceased.why_hmp"))
         get_evidence_badge("machine_perfusion")
         st.markdown("")
         
-        st.write(t("Warum Mannitol?", "Why Mannitol?"))
+        st.write(tr("deceased.why_mannitol"))
         get_evidence_badge("mannitol")
 
+    # --- DONOR RISK: KDRI / KDPI -> SCS vs. HMP ---
+    with st.expander(tr("deceased.kdri_expander")):
+        model = get_kdri_model()
+        st.caption(tr("deceased.kdri_intro").format(kdpi=model.hmp["kdpi"]))
+        with st.form("kdri_donor"):
+            k1, k2, k3 = st.columns(3)
+            donor = {
+                "age": k1.number_input(tr("deceased.kdri_age"), 0, 100, 45),
+                "height_cm": k2.number_input(tr("deceased.kdri_height"), 40, 230, 170),
+                "weight_kg": k3.number_input(tr("deceased.kdri_weight"), 2, 250, 80),
+                "creatinine": k1.number_input(tr("deceased.kdri_creatinine"), 0.1, 20.0, 1.0, 0.1),
+                "hypertension": k2.checkbox(tr("deceased.kdri_hypertension")),
+                "diabetes": k2.checkbox(tr("deceased.kdri_diabetes")),
+                "cva": k2.checkbox(tr("deceased.kdri_cva")),
+                "hcv": k3.checkbox(tr("deceased.kdri_hcv")),
+                "dcd": k3.checkbox(tr("deceased.kdri_dcd")),
+            }
+            st.form_submit_button(tr("deceased.kdri_submit"))
+        result = model.score_one(donor)
+        m1, m2, m3 = st.columns(3)
+        m1.metric("KDRI", f"{result['kdri']:.2f}")
+        m2.metric("KDPI", f"{result['kdpi']:.0f} %")
+        m3.metric("ECD", "✓" if result["ecd"] else "–")
+        storage = kdri.STATUS_NAMES[result["storage"]]
+        {"hmp": st.success, "scs": st.info, "missing": st.warning}[storage](tr(f"deceased.kdri_{storage}"))
+        get_evidence_badge(result["evidence"])
+
+        st.caption(tr("deceased.kdri_help").format(columns=", ".join(f"`{c}`" for c in model.columns)))
+        registry = st.file_uploader(tr("deceased.kdri_upload"), type=["csv", "parquet"])
+        if registry is not None:
+            # Scored once per uploaded file and session; form submits rerun the page without re-scoring.
+            if st.session_state.get("kdri_file") != registry.file_id:
+                registry.seek(0)
+                try:
+                    summary = kdri.score_file(registry, model)
+                except ValueError as exc:
+                    summary = {"error": str(exc)}
+                st.session_state["kdri_file"], st.session_state["kdri_summary"] = registry.file_id, summary
+            summary = st.session_state["kdri_summary"]
+            if "error" in summary:
+                st.error(summary["error"])
+            else:
+                st.write(tr("deceased.kdri_summary").format(donors=summary["donors"], ecd=summary["ecd"]))
+                st.table(pd.DataFrame([{tr(f"status.{name}"): summary[name] for name in kdri.STATUS_NAMES.values()}]))
+
     st.divider()
     
-    st.subheader(t("Vergleich: Lagerungsmethoden", "Comparison: Storage Methods"))
-    if current_lang == "Deutsch":
-        comp_df = pd.DataFrame({
-            "Methode": ["Statische Kältelagerung (SCS)", "Hypotherme Maschinenperfusion (HMP)"],
-            "Prinzip": ["Eisbox (4°C)", "Pulsatile Durchspülung"],
-            "Vorteil": ["Einfach, Billig", "Geringere DGF Rate, Qualitätscheck"],
-            "Indikation": ["Standard-Spender (SCD)", "Marginale Spender (ECD)"]
-        })
-    else:
-        comp_df = pd.DataFrame({
-            "Method": ["Static Cold Storage (SCS)", "Hypothermic Machine Perfusion (HMP)"],
-            "Principle": ["Ice box (4°C)", "Pulsatile Flow"],
-            "Benefit": ["Simple, Cheap", "Lower DGF rate, Quality Assessment"],
-            "Indication": ["Standard Donor (SCD)", "Marginal Donor (ECD)"]
-        })
+    st.subheader(tr("deceased.storage_comparison"))
+    comp_df = get_table("storage_comparison", current_lang)
     st.table(comp_df)
 
 # === 3. LIVING DONOR (RDN) ===
 elif nav_selection == nav_options["Living"]:
-    st.title(t("Robotische Spendernephrektomie (RDN)", "Robotic Donor Nephrectomy (RDN)"))
+    st.title(tr("living.title"))
     
     t1, t2, t3 = st.tabs([
-        t("Workflow (Diagramm)", "Workflow (Diagram)"), 
-        t("Schritte & Technik", "Steps & Technique"), 
-        t("Pharmakologie", "Pharmacology")
+        tr("living.tab_workflow"), 
+        tr("living.tab_steps"), 
+        tr("living.tab_pharma")
     ])
     
     with t1:
-        st.graphviz_chart(render_donor_workflow(current_lang))
-        st.caption(t("Fokus: Sicherheit & Minimale Ischämie", "Focus: Safety & Minimal Ischemia"))
+        render_workflow(DONOR_WORKFLOW, current_lang)
+        st.caption(tr("living.workflow_caption"))
+        show_ischemia("rdn")
     
     with t2:
-        st.subheader(t("Detaillierte Schritte", "Detailed Steps"))
-        st.markdown(t("**1. Lagerung:** 60° Seitenlage.", "**1. Positioning:** 60° Flank position."))
+        st.subheader(tr("living.steps_header"))
+        st.markdown(tr("living.step_positioning"))
         st.markdown("")
         
-        st.markdown(t("**2. ICG-Check:** Vor Ureter-Schnitt Perfusion prüfen.", "**2. ICG-Check:** Verify perfusion before ureter cut."))
+        st.markdown(tr("living.step_icg"))
         get_evidence_badge("icg_ureter")
         
-        st.markdown(t("**3. Stapling:** Vascular Stapler verwenden.", "**3. Stapling:** Use Vascular Stapler."))
+        st.markdown(tr("living.step_stapling"))
         get_evidence_badge("stapler_safety")
         
     with t3:
-        st.subheader(t("Spender-Medikation (Intra-Op)", "Donor Medication (Intra-Op)"))
-        st.error(t("Gabe 3-5 min vor Abklemmen!", "Administer 3-5 min before clamping!"))
+        st.subheader(tr("living.pharma_header"))
+        st.error(tr("living.pharma_timing"))
         
-        if current_lang == "Deutsch":
-            pharma_df = pd.DataFrame({
-                "Medikament": ["Heparin", "Mannitol", "Furosemid"],
-                "Dosis": ["5000 IE", "25g (125ml)", "20-40mg"],
-                "Effekt": ["Thromboseprophylaxe", "Radikalfänger", "Diurese"]
-            })
-        else:
-            pharma_df = pd.DataFrame({
-                "Drug": ["Heparin", "Mannitol", "Furosemide"],
-                "Dose": ["5000 IU", "25g (125ml)", "20-40mg"],
-                "Effect": ["Thrombosis Prophylaxis", "Radical Scavenger", "Diuresis"]
-            })
+        pharma_df = get_table("donor_pharma", current_lang)
         st.table(pharma_df)
         get_evidence_badge("heparin_donor")
 
 # === 4. RECIPIENT SURGERY (RAKT) ===
 elif nav_selection == nav_options["Recipient"]:
-    st.title(t("Robotische Implantation (RAKT)", "Robotic Implantation (RAKT)"))
-    st.info(t("Detaillierter Workflow & Vergleich", "Detailed Workflow & Comparison"))
+    st.title(tr("recipient.title"))
+    st.info(tr("recipient.subtitle"))
 
     t1, t2, t3 = st.tabs([
-        t("Workflow (Diagramm)", "Workflow (Diagram)"), 
-        t("Vergleich (Offen vs. RAKT)", "Comparison (Open vs. RAKT)"), 
-        t("Pharmakologie", "Pharmacology")
+        tr("recipient.tab_workflow"), 
+        tr("recipient.tab_comparison"), 
+        tr("recipient.tab_pharma")
     ])
     
     with t1:
-        st.subheader(t("Implantations-Workflow", "Implantation Workflow"))
-        st.write(t("Beachten Sie die **Regionale Hypothermie**.", "Note the **Regional Hypothermia**."))
-        st.graphviz_chart(render_recipient_workflow(current_lang))
+        st.subheader(tr("recipient.workflow_header"))
+        st.write(tr("recipient.workflow_note"))
+        render_workflow(RECIPIENT_WORKFLOW, current_lang)
+        show_ischemia("rakt")
     
     with t2:
-        st.subheader(t("Warum Robotisch? (Vergleichsdaten)", "Why Robotic? (Comparison Data)"))
+        st.subheader(tr("recipient.comparison_header"))
         st.markdown("")
         
-        if current_lang == "Deutsch":
-            comp_df = pd.DataFrame({
-                "Parameter": ["Inzisionslänge", "Wundinfektion (SSI)", "Lymphozelen", "Warm-Ischämie"],
-                "Offene NTX": ["15-20 cm", "10-15% (bei BMI>30)", "Häufig", "30-40 min"],
-                "Robotische NTX": ["6 cm", "< 4%", "Selten", "45-55 min"]
-            })
-        else:
-            comp_df = pd.DataFrame({
-                "Parameter": ["Incision Length", "Infection (SSI)", "Lymphoceles", "Warm Ischemia"],
-                "Open KTx": ["15-20 cm", "10-15% (if BMI>30)", "Frequent", "30-40 min"],
-                "Robotic KTx": ["6 cm", "< 4%", "Rare", "45-55 min"]
-            })
+        comp_df = get_table("rakt_comparison", current_lang)
         st.table(comp_df)
         get_evidence_badge("rakt_safety")
         
     with t3:
-        st.subheader(t("Empfänger-Medikation", "Recipient Medication"))
-        st.warning(t("Timing: Bevor die Gefäßklemmen geöffnet werden.", "Timing: Before unclamping."))
+        st.subheader(tr("recipient.pharma_header"))
+        st.warning(tr("recipient.pharma_timing"))
         
-        if current_lang == "Deutsch":
-            rec_meds = pd.DataFrame({
-                "Medikament": ["Methylprednisolon", "Furosemid"],
-                "Dosis": ["250-500 mg", "200 mg"],
-                "Ziel": ["Schutz vor Reperfusionsschaden", "Anregung Primärfunktion"]
-            })
-        else:
-            rec_meds = pd.DataFrame({
-                "Drug": ["Methylprednisolone", "Furosemide"],
-                "Dose": ["250-500 mg", "200 mg"],
-                "Goal": ["Reperfusion Injury Protection", "Kickstart Function"]
-            })
+        rec_meds = get_table("recipient_meds", current_lang)
         st.table(rec_meds)
 
 # === 5. FOLLOW UP (EXPANDED) ===
 elif nav_selection == nav_options["FollowUp"]:
-    st.title(t("Nachsorge & Guidelines", "Follow-Up & Guidelines"))
+    st.title(tr("followup.title"))
     
     # New Tabs for better structure
-    f_tab1, f_tab2 = st.tabs([t("Diagnostik: Kreatinin vs. dd-cfDNA", "Diagnostics: Creatinine vs. dd-cfDNA"), t("Immunsuppression", "Immunosuppression")])
+    f_tab1, f_tab2 = st.tabs([tr("followup.tab_diagnostics"), tr("followup.tab_immunosuppression")])
 
     with f_tab1:
-        st.subheader(t("Paradigmenwechsel: Von Funktion zu Molekularer Schädigung", "Paradigm Shift: From Function to Molecular Injury"))
+        st.subheader(tr("followup.paradigm_header"))
         
         col_dd1, col_dd2 = st.columns([1, 1])
         
         with col_dd1:
-            st.markdown(t("### 📉 Der Standard: Kreatinin", "### 📉 The Standard: Creatinine"))
-            st.write(t(
-                "Kreatinin ist ein **Funktionsmarker**. Er steigt erst an, wenn bereits ~50% der Nephrone geschädigt sind.",
-                "Creatinine is a **functional marker**. It only rises once ~50% of nephrons are already compromised."
-            ))
-            st.warning(t("Problem: 'Lag Time' (Verzögerung). Eine Abstoßung läuft oft schon seit Wochen, bevor das Kreatinin steigt.", 
-                         "Problem: 'Lag Time'. Rejection often proceeds for weeks before Creatinine rises."))
+            st.markdown(tr("followup.creatinine_header"))
+            st.write(tr("followup.creatinine_text"))
+            st.warning(tr("followup.creatinine_problem"))
 
         with col_dd2:
-            st.markdown(t("### 🧬 Die Zukunft: dd-cfDNA", "### 🧬 The Future: dd-cfDNA"))
-            st.write(t(
-                "Donor-derived cell-free DNA ist ein **Schädigungsmarker** (Injury Marker). Zellen des Spenders sterben ab und setzen DNA ins Blut frei.",
-                "Donor-derived cell-free DNA is an **injury marker**. Donor cells die and release DNA into the bloodstream."
-            ))
-            st.success(t("Vorteil: Hoher Negativer Prädiktiver Wert (NPV). Wenn dd-cfDNA niedrig ist (<0.5%), ist eine Abstoßung sehr unwahrscheinlich -> Biopsie gespart.",
-                         "Benefit: High Negative Predictive Value (NPV). If dd-cfDNA is low (<0.5%), rejection is highly unlikely -> Biopsy avoided."))
+            st.markdown(tr("followup.ddcfdna_header"))
+            st.write(tr("followup.ddcfdna_text"))
+            st.success(tr("followup.ddcfdna_benefit"))
 
         st.markdown("---")
-        # --- REPLACED CAPTION WITH PERSISTENT GRAPH ---
-        st.pyplot(render_biomarker_chart())
-        # ----------------------------------------------
+        # --- PRE-RENDERED KINETICS CHART ---
+        with st.expander(tr("followup.kinetics_expander")):
+            k1, k2, k3 = st.columns(3)
+            lead_time = k1.slider(tr("followup.lead_time"), 0.0, 3.0, 0.7, 0.1)
+            peak = k2.slider(tr("followup.dd_peak"), 0.5, 5.0, 3.0, 0.1)
+            rise_slope = k3.slider(tr("followup.creatinine_slope"), 1.0, 10.0, 5.0, 0.5)
+        params = KineticsParams(lead_time=lead_time, peak=peak, rise_slope=rise_slope)
+        st.image(render_biomarker_chart(current_lang, params), width="stretch")
+
+        # --- LAB SURVEILLANCE (REAL SERIES) ---
+        with st.expander(tr("followup.labs_expander")):
+            import surveillance
+            st.caption(tr("followup.labs_help"))
+            labs = st.file_uploader(tr("followup.labs_upload"), type=["csv", "parquet"])
+            if labs is not None:
+                # One engine per uploaded file and session; reruns reuse its state.
+                if st.session_state.get("labs_file") != labs.file_id:
+                    engine, error = surveillance.SurveillanceEngine(), None
+                    labs.seek(0)
+                    try:
+                        engine.ingest_file(labs)
+                    except ValueError as exc:
+                        error = str(exc)
+                    st.session_state["labs_file"] = labs.file_id
+                    st.session_state["labs_engine"], st.session_state["labs_error"] = engine, error
+                    # Series read so far, by patient: slider and widget reruns never re-read the upload.
+                    st.session_state["labs_series"] = {}
+                engine = st.session_state["labs_engine"]
+                if st.session_state["labs_error"]:
+                    st.error(st.session_state["labs_error"])
+                else:
+                    flagged = engine.snapshot()
+                    st.write(tr("followup.labs_summary").format(rows=engine.rows, patients=engine.patients, flagged=len(flagged)))
+                    st.dataframe(flagged, use_container_width=True)
+                    choices = flagged if len(flagged) else engine.snapshot(flagged_only=False)
+                    patient = st.selectbox(tr("followup.labs_patient"), choices["patient_id"].tolist())
+                    if patient is not None:
+                        series = st.session_state["labs_series"]
+                        if patient not in series:
+                            labs.seek(0)
+                            series[patient] = surveillance.patient_series(labs, patient)
+                        st.image(render_lab_series(series[patient], patient, current_lang), width="stretch")
+        # -----------------------------------
         st.markdown("---")
 
-        st.subheader(t("Vergleichstabelle", "Comparison Table"))
+        st.subheader(tr("followup.comparison_header"))
         
-        if current_lang == "Deutsch":
-            comp_markers = pd.DataFrame({
-                "Marker": ["Serum Kreatinin", "Proteinurie", "dd-cfDNA (Blut)"],
-                "Was wird gemessen?": ["Filtrationsleistung (GFR)", "Glomeruläre Integrität", "Zelluntergang (Nekrose/Apoptose)"],
-                "Detektionszeitpunkt": ["Spät (Funktionsverlust)", "Mittel", "Früh (Aktive Entzündung)"],
-                "Cut-Off": ["Trend > 20% Anstieg", "> 0.5 - 1.0 g/g", "> 0.5% - 1.0% (Assay-abhängig)"]
-            })
-        else:
-            comp_markers = pd.DataFrame({
-                "Marker": ["Serum Creatinine", "Proteinuria", "dd-cfDNA (Blood)"],
-                "Measures": ["Filtration Power (GFR)", "Glomerular Integrity", "Cell Death (Necrosis/Apoptosis)"],
-                "Detection Time": ["Late (Function Loss)", "Medium", "Early (Active Inflammation)"],
-                "Cut-Off": ["Trend > 20% rise", "> 0.5 - 1.0 g/g", "> 0.5% - 1.0% (Assay dependent)"]
-            })
+        comp_markers = get_table("biomarkers", current_lang)
         st.table(comp_markers)
         get_evidence_badge("dd_cfdna_kinetics")
 
     with f_tab2:
-        st.subheader(t("Immunsuppression (Standard)", "Immunosuppression (Standard)"))
+        st.subheader(tr("followup.immunosuppression_header"))
         st.code("Tacrolimus (Target 8-10 ng/ml) + MMF (2g/d) + Steroide (Tapering)")
-        st.write(t(
-            "Biopsie-Indikation bleibt Goldstandard bei unklarem Befund.",
-            "Biopsy remains gold standard for unclear findings."
-        ))
+        st.write(tr("followup.biopsy_note"))
 
 # === 6. SEARCH ===
 elif nav_selection == nav_options["Search"]:
-    st.title(t("Live Suche", "Live Search"))
-    q = st.text_input(t("Suchbegriff", "Search Query"), "kidney transplantation guidelines 2026")
-    if st.button(t("Suchen", "Search")):
-        res = fetch_pubmed_data(q)
-        for r in res:
-            st.write(f"**{r['Titel']}** ({r['Date']})")
-            st.caption(r['Abstract'])
-            st.markdown("---")
+    st.title(tr("search.title"))
+    q = st.text_input(tr("search.query"), "kidney transplantation guidelines 2026")
+    st.caption(tr("search.index_help"))
+    index = get_search_index()
+    # This session's PubMed cursor: articles shown so far and whether "load more" can continue.
+    search = st.session_state.get("pubmed_search")
+    if search is not None and search["query"] != q:
+        # A new query cancels the old search (a stream still running for it was stopped by this rerun).
+        search = st.session_state["pubmed_search"] = None
+    if st.button(tr("search.button")):
+        search = st.session_state["pubmed_search"] = {"query": q, "records": [], "more": True, "pending": True}
+    res = index.search(q, limit=10)
+    if not res:
+        st.info(tr("search.no_hits"))
+    for r in res:
+        show_article(r)
+
+    if search is not None:
+        st.subheader(tr("search.pubmed_header"))
+        for r in search["records"]:
+            show_article(r)
+        if search["pending"]:
+            # Each article is shown as soon as its page arrives; fetched pages also grow the local index.
+            before, fetched = len(index), 0
+            for r in stream_pubmed_data(q, start=len(search["records"])):
+                search["records"].append(r)
+                show_article(r)
+                fetched += 1
+            search["more"], search["pending"] = fetched == PAGE_SIZE, False
+            st.caption(tr("search.indexed").format(added=len(index) - before))
+        if search["more"]:
+            st.button(tr("search.load_more"), on_click=search.update, kwargs={"pending": True})
+
+    with st.expander(tr("search.refresh_expander")):
+        if st.button(tr("search.refresh_button")):
+            from evidence_refresh import refresh_evidence
+            articles, report = refresh_evidence(get_evidence_store().entries, cache=get_pubmed_cache())
+            st.caption(tr("search.refresh_summary").format(
+                queries=len(articles), wall=report['wall_s'], rps=report['throughput_rps'], errors=report['errors']
+            ))
+            st.dataframe(pd.DataFrame([
+                {"Key": key, "Latency (s)": round(s['latency_s'], 2), "Attempts": s['attempts'],
+                 "Newest": articles[key][0]['Date'] if articles[key] else "", "Error": s['error'] or ""}
+                for key, s in report['keys'].items()
+            ]), use_container_width=True)
+
+# --- METRICS ---
+metrics.observe("page_render_seconds", time.perf_counter() - _page_started, page=page_key, lang=LANGUAGES[current_lang])
+metrics.maybe_export()
+if metrics.PANEL:
+    with st.sidebar.expander("📈 Metrics"):
+        hit_rate = metrics.ratio("pubmed_cache_total", {"hit", "stale"})
+        chart_hit_rate = metrics.ratio("chart_cache_total", {"hit"})
+        st.caption(f"PubMed cache hit rate: {'-' if hit_rate is None else f'{hit_rate:.0%}'} · "
+                   f"chart cache hit rate: {'-' if chart_hit_rate is None else f'{chart_hit_rate:.0%}'}")
+        snapshot = metrics.snapshot()
+        if snapshot["histograms"]:
+            st.dataframe(pd.DataFrame(snapshot["histograms"]).round(2), hide_index=True)
+        if snapshot["counters"]:
+            st.dataframe(pd.DataFrame(snapshot["counters"]), hide_index=True)
+        st.download_button("Prometheus text", metrics.render_prometheus(), file_name="ntx_metrics.prom")
+
+if PROFILE:
+    st.sidebar.caption(f"⏱️ Script {(time.perf_counter() - _script_started) * 1e3:.0f} ms · "
+                       f"loaded: {', '.join(loaded_heavy_modules())}")
@@ -0,0 +1,226 @@
+"""Per-page rerun benchmark for KidneyTx.py.
+
+Runs the app headlessly with Streamlit's ``AppTest`` (PubMed stubbed with
+``NTX_PUBMED=fake``) and measures every navigation page in every language.
+As on the server, the script is compiled once per process, not on every run:
+
+* ``cold_ms``: the first visit of the page in a new session (the process is
+  warmed up first, so imports and process-wide caches are excluded; see
+  ``startup.py`` for the cold process start),
+* ``rerun_ms``: median and p95 over ``--reruns`` further reruns,
+* ``peak_kib`` / ``retained_kib``: tracemalloc peak above the starting point
+  and memory still held after one traced rerun (a separate pass, so tracing
+  does not distort the timings),
+* per tab: element count and serialized payload size. Streamlit executes the
+  body of every tab on each rerun, so tabs are not timed separately; their
+  payload shows which tab a regression comes from.
+
+Results are compared against ``bench_pages_baseline.json``; a page fails when
+it exceeds both the ratio and the absolute slack of a threshold.
+
+    python bench_pages.py               # compare with the baseline, exit 1 on regression
+    python bench_pages.py --update      # record a new baseline
+    python bench_pages.py --pages Search --langs English --json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from startup import APP
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_pages_baseline.json")
+
+# Navigation keys of KidneyTx.py and the message id of their radio label.
+PAGES = {
+    "Dashboard": "nav.dashboard",
+    "Prep": "nav.prep",
+    "Deceased": "nav.deceased",
+    "Living": "nav.living",
+    "Recipient": "nav.recipient",
+    "FollowUp": "nav.followup",
+    "Search": "nav.search",
+}
+
+DEFAULT_THRESHOLDS = {
+    "rerun_ratio": 1.5, "rerun_slack_ms": 50.0,
+    "cold_ratio": 2.0, "cold_slack_ms": 250.0,
+    "peak_ratio": 1.3, "peak_slack_kib": 1024.0,
+    "retained_ratio": 1.5, "retained_slack_kib": 256.0,
+    "payload_ratio": 1.2, "payload_slack_kib": 16.0,
+}
+
+# metric -> (ratio, slack) threshold names
+_CHECKS = {
+    "rerun_ms": ("rerun_ratio", "rerun_slack_ms"),
+    "cold_ms": ("cold_ratio", "cold_slack_ms"),
+    "peak_kib": ("peak_ratio", "peak_slack_kib"),
+    "retained_kib": ("retained_ratio", "retained_slack_kib"),
+}
+
+
+def _tab_stats(at):
+    tabs = {}
+    for i, tab in enumerate(at.tabs):
+        elements = list(tab)
+        size = sum(e.proto.ByteSize() for e in elements if getattr(e, "proto", None) is not None)
+        tabs[str(i)] = {"label": tab.label, "elements": len(elements), "payload_kib": size / 1024}
+    return tabs
+
+
+def _payload_kib(at):
+    return sum(e.proto.ByteSize() for e in at.main if getattr(e, "proto", None) is not None) / 1024
+
+
+def measure(pages=None, langs=None, reruns=7, app=APP):
+    """Benchmark results keyed ``"<page>|<language>"``."""
+    # Stubbed PubMed and a fresh cache directory, so every run starts from the same state.
+    os.environ.setdefault("NTX_PUBMED", "fake")
+    os.environ.setdefault("NTX_CACHE_DIR", tempfile.mkdtemp(prefix="ntx_bench_"))
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import AppTest, local_script_runner
+    from i18n import LANGUAGES, translator
+
+    # AppTest compiles the script again on every run, the server once per process. Without a
+    # shared cache, peak_kib and rerun_ms measure compiling KidneyTx.py and grow with its size.
+    shared_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: shared_cache
+
+    pages = list(PAGES) if pages is None else pages
+    langs = list(LANGUAGES) if langs is None else langs
+    # Warm-up session: lazy imports and process-wide caches are paid here, not by the first measured page.
+    warm = AppTest.from_file(app, default_timeout=120).run()
+    for lang in langs:
+        warm.sidebar.selectbox[0].set_value(lang).run()
+        for page in pages:
+            warm.sidebar.radio[0].set_value(translator(lang)(PAGES[page])).run()
+
+    results = {}
+    for lang in langs:
+        tr = translator(lang)
+        # One session per language, like a user who picks a language and then browses.
+        at = AppTest.from_file(app, default_timeout=120).run()
+        at.sidebar.selectbox[0].set_value(lang).run()
+        for page in pages:
+            radio = at.sidebar.radio[0].set_value(tr(PAGES[page]))
+            started = time.perf_counter()
+            radio.run()
+            cold_ms = (time.perf_counter() - started) * 1e3
+            if at.exception:
+                raise RuntimeError(f"{page}/{lang}: {at.exception[0].value}")
+
+            timings = []
+            for _ in range(reruns):
+                started = time.perf_counter()
+                at.run()
+                timings.append((time.perf_counter() - started) * 1e3)
+
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            at.run()
+            after, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            timings.sort()
+            results[f"{page}|{lang}"] = {
+                "cold_ms": cold_ms,
+                "rerun_ms": statistics.median(timings),
+                "rerun_p95_ms": timings[min(len(timings) - 1, int(0.95 * len(timings)))],
+                "peak_kib": (peak - before) / 1024,
+                "retained_kib": max(after - before, 0) / 1024,
+                "payload_kib": _payload_kib(at),
+                "tabs": _tab_stats(at),
+            }
+    return results
+
+
+def _exceeds(value, base, ratio, slack):
+    return value > base * ratio and value - base > slack
+
+
+def compare(results, baseline):
+    """Regression messages for ``results`` against a baseline document."""
+    thresholds = dict(DEFAULT_THRESHOLDS, **baseline.get("thresholds", {}))
+    problems = []
+    for key, result in results.items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        for metric, (ratio, slack) in _CHECKS.items():
+            if _exceeds(result[metric], base[metric], thresholds[ratio], thresholds[slack]):
+                problems.append(f"{key}: {metric} {result[metric]:.1f} vs baseline {base[metric]:.1f}")
+        for tab, stats in result["tabs"].items():
+            base_tab = base.get("tabs", {}).get(tab)
+            if base_tab and _exceeds(stats["payload_kib"], base_tab["payload_kib"],
+                                     thresholds["payload_ratio"], thresholds["payload_slack_kib"]):
+                problems.append(f"{key}: tab {stats['label']!r} payload {stats['payload_kib']:.1f} KiB "
+                                f"vs baseline {base_tab['payload_kib']:.1f} KiB")
+    return problems
+
+
+def load_baseline(path=BASELINE):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _rounded(value):
+    if isinstance(value, dict):
+        return {k: _rounded(v) for k, v in value.items()}
+    return round(value, 1) if isinstance(value, float) else value
+
+
+def save_baseline(results, path=BASELINE, thresholds=None):
+    doc = {"thresholds": thresholds or DEFAULT_THRESHOLDS, "results": _rounded(results)}
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(doc, fh, ensure_ascii=False, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def format_results(results):
+    lines = [f"{'page|language':<22}{'cold ms':>9}{'rerun ms':>10}{'p95 ms':>9}{'peak KiB':>10}{'held KiB':>10}{'payload':>9}"]
+    for key, r in results.items():
+        lines.append(f"{key:<22}{r['cold_ms']:>9.1f}{r['rerun_ms']:>10.1f}{r['rerun_p95_ms']:>9.1f}"
+                     f"{r['peak_kib']:>10.0f}{r['retained_kib']:>10.0f}{r['payload_kib']:>9.1f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-page rerun latency and memory of KidneyTx.py.")
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES))
+    parser.add_argument("--langs", nargs="+")
+    parser.add_argument("--reruns", type=int, default=7)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--json", action="store_true", help="print machine-readable output")
+    args = parser.parse_args(argv)
+
+    results = measure(args.pages, args.langs, args.reruns)
+    if args.update:
+        previous = load_baseline(args.baseline)
+        merged = dict(previous["results"]) if previous else {}
+        merged.update(results)
+        save_baseline(merged, args.baseline, previous and previous.get("thresholds"))
+        problems = []
+    else:
+        baseline = load_baseline(args.baseline)
+        problems = compare(results, baseline) if baseline else []
+
+    if args.json:
+        print(json.dumps({"results": results, "regressions": problems}, indent=2))
+    else:
+        print(format_results(results))
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if not args.update and not problems:
+            print("No regressions." if os.path.exists(args.baseline) else f"No baseline at {args.baseline} (run with --update).")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
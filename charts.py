@@ -0,0 +1,174 @@
+"""Pre-rendered biomarker kinetics charts.
+
+Charts are drawn on standalone ``matplotlib.figure.Figure`` objects (never
+registered with pyplot, so nothing accumulates in its figure manager), saved to
+PNG/SVG bytes and released immediately. The bytes are kept in a small LRU
+keyed by kinetics parameters, language and format, so memory per worker stays
+bounded however many pages are viewed.
+"""
+import io
+import threading
+from collections import OrderedDict, namedtuple
+
+import metrics
+from startup import LazyModule
+
+np = LazyModule("numpy")
+
+# Defaults reproduce the original illustrative curves: creatinine sigmoid
+# centred at +0.2 months, dd-cfDNA peak 0.7 months earlier at -0.5.
+KineticsParams = namedtuple(
+    "KineticsParams",
+    ["lead_time", "peak", "rise_slope", "onset", "creatinine_base", "creatinine_rise", "dd_base", "dd_width"],
+    defaults=[0.7, 3.0, 5.0, 0.2, 1.0, 2.0, 0.2, 1.5],
+)
+
+LABELS = {
+    "Deutsch": {
+        "x": "Zeit (Monate)",
+        "creatinine": "Serum Kreatinin (mg/dl)",
+        "title": "Biomarker-Kinetik: Schädigung (DNA) vs. Funktion (Kreatinin)",
+        "lead": "Vorlaufzeit\n({:.1f} Monate)",
+        "creatinine_legend": "Kreatinin (Funktion)",
+        "dd_legend": "dd-cfDNA (Schädigung)",
+        "diagnosis": "Klinische Diagnose",
+        "date": "Datum",
+        "series_title": "Verlauf Patient {}",
+        "cutoff": "dd-cfDNA Cut-off ({:.1f}%)",
+    },
+    "English": {
+        "x": "Time (Months)",
+        "creatinine": "Serum Creatinine (mg/dl)",
+        "title": "Biomarker Kinetics: Injury (DNA) vs. Function (Creatinine)",
+        "lead": "Lead Time\n({:.1f} Months)",
+        "creatinine_legend": "Creatinine (Function)",
+        "dd_legend": "dd-cfDNA (Injury)",
+        "diagnosis": "Clinical Diagnosis",
+        "date": "Date",
+        "series_title": "Patient {} lab series",
+        "cutoff": "dd-cfDNA cut-off ({:.1f}%)",
+    },
+}
+
+MAX_CACHED_CHARTS = 64
+
+
+def kinetics(params=KineticsParams(), points=100, span=3.0):
+    """Time axis (months relative to diagnosis) with creatinine and dd-cfDNA curves."""
+    t_axis = np.linspace(-span, span, points)
+    # Creatinine: stays low, rises at the onset of clinical rejection.
+    creatinine = params.creatinine_base + params.creatinine_rise / (1 + np.exp(-params.rise_slope * (t_axis - params.onset)))
+    # dd-cfDNA: molecular injury peaks ``lead_time`` months before the creatinine rise.
+    dd_peak_at = params.onset - params.lead_time
+    dd_cfdna = params.dd_base + params.peak * np.exp(-((t_axis - dd_peak_at) ** 2) / params.dd_width)
+    return t_axis, creatinine, dd_cfdna
+
+
+def _draw(fig, params, lang):
+    from matplotlib.lines import Line2D
+
+    labels = LABELS.get(lang, LABELS["English"])
+    t_axis, creatinine, dd_cfdna = kinetics(params)
+
+    ax1 = fig.add_subplot(1, 1, 1)
+    color = 'tab:blue'
+    ax1.set_xlabel(labels["x"])
+    ax1.set_ylabel(labels["creatinine"], color=color)
+    ax1.plot(t_axis, creatinine, color=color, linewidth=3)
+    ax1.tick_params(axis='y', labelcolor=color)
+    ax1.grid(True, alpha=0.3)
+
+    ax2 = ax1.twinx()
+    color = 'tab:red'
+    ax2.set_ylabel('dd-cfDNA (%)', color=color)
+    ax2.plot(t_axis, dd_cfdna, color=color, linestyle='--', linewidth=3)
+    ax2.tick_params(axis='y', labelcolor=color)
+
+    ax1.set_title(labels["title"])
+    ax1.axvline(x=0, color='gray', linestyle=':')
+
+    dd_peak_at = params.onset - params.lead_time
+    arrow_y = params.dd_base + params.peak / 2
+    ax2.annotate(labels["lead"].format(params.lead_time), xy=(dd_peak_at - 0.5, arrow_y),
+                 xytext=(dd_peak_at - 2.0, arrow_y + params.peak / 6),
+                 arrowprops=dict(facecolor='black', shrink=0.05))
+    ax1.legend(handles=[
+        Line2D([], [], color='tab:blue', linewidth=3, label=labels["creatinine_legend"]),
+        Line2D([], [], color='tab:red', linestyle='--', linewidth=3, label=labels["dd_legend"]),
+        Line2D([], [], color='gray', linestyle=':', label=labels["diagnosis"]),
+    ], loc="upper left", fontsize="small")
+
+
+def render_figure_bytes(draw, fmt="png", figsize=(8, 4), dpi=100):
+    """Runs ``draw(fig)`` on a fresh pyplot-free figure and returns the encoded bytes."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    try:
+        draw(fig)
+        buf = io.BytesIO()
+        fig.savefig(buf, format=fmt, bbox_inches="tight")
+        return buf.getvalue()
+    finally:
+        fig.clear()
+
+
+_chart_cache = OrderedDict()
+_chart_lock = threading.Lock()
+
+
+def render_biomarker_chart(lang="English", params=KineticsParams(), fmt="png"):
+    """Creatinine vs dd-cfDNA kinetics chart as PNG/SVG bytes, rendered once per parameter set."""
+    key = (tuple(round(float(v), 3) for v in params), lang, fmt)
+    with _chart_lock:
+        data = _chart_cache.get(key)
+        if data is not None:
+            _chart_cache.move_to_end(key)
+            metrics.inc("chart_cache_total", result="hit")
+            return data
+    metrics.inc("chart_cache_total", result="miss")
+    with metrics.timer("chart_render_seconds", chart="kinetics"):
+        data = render_figure_bytes(lambda fig: _draw(fig, params, lang), fmt=fmt)
+    with _chart_lock:
+        _chart_cache[key] = data
+        while len(_chart_cache) > MAX_CACHED_CHARTS:
+            _chart_cache.popitem(last=False)
+    return data
+
+
+def _draw_series(fig, series, patient_id, lang, cutoffs):
+    labels = LABELS.get(lang, LABELS["English"])
+    creatinine = series["creatinine"].dropna()
+    dd_cfdna = series["dd_cfdna"].dropna()
+
+    ax1 = fig.add_subplot(1, 1, 1)
+    ax1.set_xlabel(labels["date"])
+    ax1.set_ylabel(labels["creatinine"], color='tab:blue')
+    ax1.plot(creatinine.index, creatinine.to_numpy(), color='tab:blue', marker='o', markersize=3, linewidth=2,
+             label=labels["creatinine_legend"])
+    ax1.tick_params(axis='y', labelcolor='tab:blue')
+    ax1.grid(True, alpha=0.3)
+
+    ax2 = ax1.twinx()
+    ax2.set_ylabel('dd-cfDNA (%)', color='tab:red')
+    ax2.plot(dd_cfdna.index, dd_cfdna.to_numpy(), color='tab:red', linestyle='--', marker='s', markersize=3,
+             linewidth=2, label=labels["dd_legend"])
+    for cutoff in cutoffs:
+        ax2.axhline(cutoff, color='tab:red', linestyle=':', alpha=0.6, label=labels["cutoff"].format(cutoff))
+    ax2.tick_params(axis='y', labelcolor='tab:red')
+
+    ax1.set_title(labels["series_title"].format(patient_id))
+    handles = ax1.get_legend_handles_labels()[0] + ax2.get_legend_handles_labels()[0]
+    ax1.legend(handles=handles, loc="upper left", fontsize="small")
+    fig.autofmt_xdate()
+
+
+def render_lab_series(series, patient_id, lang="English", cutoffs=(0.5, 1.0), fmt="png"):
+    """One patient's measured creatinine / dd-cfDNA series (see ``surveillance.patient_series``) as bytes.
+
+    Not cached: the data changes with every lab file.
+    """
+    with metrics.timer("chart_render_seconds", chart="lab_series"):
+        return render_figure_bytes(lambda fig: _draw_series(fig, series, patient_id, lang, cutoffs), fmt=fmt)
@@ -0,0 +1,220 @@
+"""Incremental literature digest behind the Dashboard's "What's New" cards.
+
+Each topic in ``content/digest_topics.json`` has a PubMed query and a
+publication-date watermark, the newest date seen so far but never later than
+the day of the sync (PubMed has future-dated issues). A sync only asks
+PubMed for articles published on or after the watermark (a ``[PDAT]`` range
+on the query) and merges them into the topic's newest ``keep`` articles. A
+daily run therefore costs a page per topic instead of a full re-query; the
+first sync starts ``lookback_days`` back.
+
+The result is one JSON snapshot (``NTX_DIGEST``, default
+``<cache dir>/digest.json``), replaced atomically. The Dashboard only reads
+that file, never the network, and picks up a new snapshot by itself like the
+other versioned stores.
+
+    python digest.py              # sync all topics (run daily from cron or a systemd timer)
+    python digest.py --full       # ignore the watermarks and start over from lookback_days
+    NTX_PUBMED=fake python digest.py --today 2026-07-01 --json
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from content import VersionedFile
+from evidence_refresh import DEFAULT_RATE, TokenBucket, query_with_retry
+from pubmed_client import make_client
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.environ.get("NTX_CACHE_DIR", os.path.join(ROOT, ".ntx_cache"))
+DEFAULT_PATH = os.environ.get("NTX_DIGEST", os.path.join(DEFAULT_DIR, "digest.json"))
+TOPICS_PATH = os.path.join(ROOT, "content", "digest_topics.json")
+
+PAGE_SIZE = 20
+MAX_PAGES = 10  # per topic and run; a larger backlog is cut off and the watermark moves on
+NEW_DAYS = 7    # articles first seen this recently are marked as new
+
+
+def load_topics(path=TOPICS_PATH):
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def since_query(query, watermark):
+    """``query`` restricted to articles published on or after ``watermark`` (ISO date)."""
+    return f'({query}) AND ("{watermark.replace("-", "/")}"[PDAT] : "3000"[PDAT])'
+
+
+def pubmed_url(pmid):
+    return f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
+
+
+def is_new(article, today=None):
+    """True if the digest first saw ``article`` within the last ``NEW_DAYS`` days."""
+    today = today or datetime.date.today()
+    return article.get("first_seen", "") >= (today - datetime.timedelta(days=NEW_DAYS)).isoformat()
+
+
+# --- SYNC ---
+def sync_topic(topic, state, today, lookback_days=90, keep=10, client_factory=make_client, bucket=None,
+               retries=3, backoff=0.5, page_size=PAGE_SIZE, max_pages=MAX_PAGES):
+    """Fetches the articles of one topic newer than its watermark and merges them into ``state``.
+
+    Returns ``(state, fresh, stats)``. After a failed page the watermark stays
+    where it was, so the next run asks again; articles already fetched are
+    kept and recognized by PMID.
+    """
+    bucket = bucket or TokenBucket(DEFAULT_RATE)
+    watermark = state.get("watermark") or (today - datetime.timedelta(days=lookback_days)).isoformat()
+    query = since_query(topic["query"], watermark)
+    # The range includes the watermark day, so its articles come back on every run.
+    known = {a["PMID"] for a in state.get("articles", ())} | set(state.get("watermark_pmids", ()))
+
+    fresh, requests, error, truncated = [], 0, None, False
+    for page in range(max_pages):
+        records, attempts, error = query_with_retry(client_factory, bucket, query, page_size, retries, backoff,
+                                                     start=page * page_size, where="digest_sync")
+        requests += attempts
+        if error is not None:
+            break
+        for record in records:
+            if record["PMID"] and record["PMID"] not in known:
+                known.add(record["PMID"])
+                fresh.append(dict(record, first_seen=today.isoformat()))
+        if len(records) < page_size:
+            break
+    else:
+        truncated = True
+
+    if error is None:
+        # PubMed has future-dated issues; a watermark past today would skip everything published until then.
+        newest = min(max([watermark] + [a["Date"][:10] for a in fresh]), today.isoformat())
+        at_watermark = set(state.get("watermark_pmids", ())) if newest == watermark else set()
+        at_watermark.update(a["PMID"] for a in fresh if a["Date"][:10] >= newest)
+        state = dict(state, watermark=newest, watermark_pmids=sorted(at_watermark), synced_at=today.isoformat())
+    articles = sorted(fresh + list(state.get("articles", ())), key=lambda a: a["Date"], reverse=True)[:keep]
+    state = dict(state, articles=articles, new=len(fresh))
+    stats = {"query": query, "requests": requests, "new": len(fresh), "watermark": state.get("watermark", watermark),
+             "truncated": truncated, "error": error}
+    return state, fresh, stats
+
+
+def sync(path=DEFAULT_PATH, topics_path=TOPICS_PATH, client_factory=make_client, rate=DEFAULT_RATE, today=None,
+         full=False, on_records=None, max_workers=8):
+    """Brings every topic of the digest up to date and writes the snapshot.
+
+    Topics run concurrently under one NCBI token bucket. ``on_records`` gets
+    the new articles of each topic (used to feed the local search index).
+    Returns ``(snapshot, report)``.
+    """
+    config = load_topics(topics_path)
+    today = today or datetime.date.today()
+    previous = {} if full else (load_snapshot(path) or {}).get("topics", {})
+    bucket = TokenBucket(rate)
+
+    def run(topic):
+        started = time.perf_counter()
+        state, fresh, stats = sync_topic(topic, previous.get(topic["id"], {}), today, config.get("lookback_days", 90),
+                                         config.get("keep", 10), client_factory, bucket)
+        if on_records is not None and fresh:
+            on_records(fresh)
+        return topic["id"], state, dict(stats, latency_s=time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(config["topics"])))) as pool:
+        results = list(pool.map(run, config["topics"]))
+    snapshot = {
+        "version": config.get("version"),
+        "synced_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "topics": {topic_id: state for topic_id, state, _ in results},
+    }
+    write_snapshot(snapshot, path)
+
+    per_topic = {topic_id: stats for topic_id, _, stats in results}
+    report = {
+        "topics": per_topic,
+        "wall_s": time.perf_counter() - started,
+        "requests": sum(s["requests"] for s in per_topic.values()),
+        "new": sum(s["new"] for s in per_topic.values()),
+        "errors": sum(1 for s in per_topic.values() if s["error"]),
+    }
+    return snapshot, report
+
+
+def load_snapshot(path=DEFAULT_PATH):
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(snapshot, path=DEFAULT_PATH):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(snapshot, fh, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+# --- READING (Dashboard) ---
+class DigestStore(VersionedFile):
+    """Topics of the Dashboard cards plus the latest snapshot, reloaded when a sync replaces it."""
+
+    def __init__(self, path=DEFAULT_PATH, topics_path=TOPICS_PATH, check_interval=5.0):
+        self.topics = load_topics(topics_path)["topics"]
+        self.synced_at = None
+        self._entries = {}
+        super().__init__(path, check_interval)
+
+    def reload(self):
+        if not os.path.exists(self.path):
+            # No sync has run yet: the cards show their curated text until a snapshot appears.
+            self._checked = time.monotonic()
+            return
+        super().reload()
+
+    def _build(self, doc):
+        self._entries = doc.get("topics", {})
+        self.synced_at = doc.get("synced_at")
+
+    def get(self, topic_id):
+        """Snapshot entry of one topic (watermark, newest articles), or None before the first sync."""
+        self._maybe_reload()
+        return self._entries.get(topic_id)
+
+
+def format_report(report):
+    lines = [f"{'topic':<12} {'latency':>9} {'req':>4} {'new':>4}  watermark   error"]
+    for topic_id, s in report["topics"].items():
+        note = s["error"] or ("truncated" if s["truncated"] else "")
+        lines.append(f"{topic_id:<12} {s['latency_s']:>8.3f}s {s['requests']:>4} {s['new']:>4}  {s['watermark']}  {note}")
+    lines.append(f"wall {report['wall_s']:.3f}s, {report['requests']} requests, {report['new']} new articles, "
+                 f"{report['errors']} errors")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incremental PubMed sync for the Dashboard digest.")
+    parser.add_argument("--path", default=DEFAULT_PATH, help="snapshot file")
+    parser.add_argument("--full", action="store_true", help="ignore the watermarks and start over")
+    parser.add_argument("--today", type=datetime.date.fromisoformat, help="sync as of this date (default: today)")
+    parser.add_argument("--no-index", action="store_true", help="do not add new articles to the local search index")
+    parser.add_argument("--json", action="store_true", help="print machine-readable output")
+    args = parser.parse_args(argv)
+
+    on_records = None
+    if not args.no_index:
+        from search_index import SearchIndex
+        on_records = SearchIndex().add
+    _, report = sync(args.path, today=args.today, full=args.full, on_records=on_records)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Indexed, versioned evidence store behind the evidence badges.
+
+Entries (evidence level, source, backing PubMed query, topics) live in
+``content/evidence.json``; the statements themselves are translated text in
+the locale catalogs under ``evidence.<key>``. The store keeps secondary
+indexes on level, source, topic and language so questions like "all Level 1a
+statements" or "all safety alerts" are set lookups. It reloads when the file
+changes and accepts incremental ``upsert``/``remove`` without a restart.
+"""
+import json
+import os
+import re
+from collections import defaultdict
+
+from content import VersionedFile
+from i18n import LANGUAGES, messages
+
+DEFAULT_PATH = os.environ.get(
+    "NTX_EVIDENCE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "content", "evidence.json"))
+
+SAFETY_LEVEL = "Safety Alert"
+
+
+def split_sources(source):
+    """Splits a combined source such as "FDA Warning / Friedman et al." into its parts."""
+    return [part.strip() for part in re.split(r"[;/]", source) if part.strip()]
+
+
+class EvidenceStore(VersionedFile):
+    def __init__(self, path=DEFAULT_PATH, check_interval=5.0):
+        self.entries = {}
+        super().__init__(path, check_interval)
+
+    def _build(self, doc):
+        self.entries = {}
+        self._by_level = defaultdict(set)
+        self._by_source = defaultdict(set)
+        self._by_topic = defaultdict(set)
+        self._by_language = defaultdict(set)
+        # Only which statements each catalog translates; the catalogs themselves are not kept.
+        self._translated = {code: {message_id[len("evidence."):] for message_id in messages(code)
+                                   if message_id.startswith("evidence.")}
+                            for code in LANGUAGES.values()}
+        for key, entry in doc["entries"].items():
+            self._index(key, entry)
+
+    def _index(self, key, entry):
+        self.entries[key] = entry
+        self._by_level[entry["Evidenz"]].add(key)
+        for source in split_sources(entry["Quelle"]):
+            self._by_source[source.lower()].add(key)
+        for topic in entry.get("Topics", ()):
+            self._by_topic[topic].add(key)
+        for code, keys in self._translated.items():
+            if key in keys:
+                self._by_language[code].add(key)
+
+    def _unindex(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self._by_level[entry["Evidenz"]].discard(key)
+        for source in split_sources(entry["Quelle"]):
+            self._by_source[source.lower()].discard(key)
+        for topic in entry.get("Topics", ()):
+            self._by_topic[topic].discard(key)
+        for keys in self._by_language.values():
+            keys.discard(key)
+
+    # --- lookups ---
+    def get(self, key):
+        """Entry for ``key`` or None (plain dict lookup)."""
+        self._maybe_reload()
+        return self.entries.get(key)
+
+    def query(self, level=None, source=None, topic=None, lang=None):
+        """Sorted keys matching every given criterion.
+
+        ``source`` matches any part of a combined source case-insensitively
+        ("compare" finds "COMPARE Trial (Lancet)"); ``lang`` is a catalog code
+        or selector label and keeps entries translated into that language.
+        """
+        self._maybe_reload()
+        candidates = []
+        if level is not None:
+            candidates.append(self._by_level.get(level, set()))
+        if topic is not None:
+            candidates.append(self._by_topic.get(topic, set()))
+        if lang is not None:
+            candidates.append(self._by_language.get(LANGUAGES.get(lang, lang), set()))
+        if source is not None:
+            needle = source.lower()
+            candidates.append(set().union(*(keys for name, keys in self._by_source.items() if needle in name)))
+        if not candidates:
+            return sorted(self.entries)
+        candidates.sort(key=len)
+        return sorted(candidates[0].intersection(*candidates[1:]))
+
+    def safety_alerts(self):
+        return self.query(level=SAFETY_LEVEL)
+
+    def levels(self):
+        return sorted(level for level, keys in self._by_level.items() if keys)
+
+    def topics(self):
+        return sorted(topic for topic, keys in self._by_topic.items() if keys)
+
+    # --- incremental updates ---
+    def upsert(self, key, entry):
+        """Adds or replaces one entry and updates the indexes in place."""
+        with self._lock:
+            self._unindex(key)
+            self._index(key, entry)
+
+    def remove(self, key):
+        with self._lock:
+            self._unindex(key)
+
+    def save(self, version):
+        """Writes the current entries back to the data file as ``version``."""
+        with self._lock:
+            doc = {"version": version, "entries": self.entries}
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(doc, fh, ensure_ascii=False, indent=2)
+                fh.write("\n")
+            os.replace(tmp, self.path)
+            self.version, self._mtime = version, os.stat(self.path).st_mtime
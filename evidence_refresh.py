@@ -0,0 +1,151 @@
+"""Concurrent literature refresh for every evidence entry.
+
+All evidence queries run at once on a thread pool. A shared token bucket keeps
+the pool under NCBI's request budget (3 req/s without an API key, 10 with
+``NCBI_API_KEY`` set), so a full refresh takes roughly as long as the slowest
+query. The bucket is charged per HTTP request, not per query: a pymed query is
+one esearch plus one efetch per 250 articles.
+
+    python evidence_refresh.py            # against PubMed
+    NTX_PUBMED=fake python evidence_refresh.py
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from pubmed_client import NCBI_API_KEY, article_to_record, make_client, query_page
+
+NCBI_RATE = 3.0
+NCBI_RATE_WITH_KEY = 10.0
+DEFAULT_RATE = NCBI_RATE_WITH_KEY if NCBI_API_KEY else NCBI_RATE
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``acquire`` blocks until a token is free.
+
+    The default capacity of one token spaces requests evenly, which keeps any
+    one-second window within ``rate``. ``acquired`` counts the tokens handed
+    out, i.e. the requests made.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.acquired = 0
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.acquired += 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def metered(client, bucket):
+    """``client`` with every HTTP request it makes charged to ``bucket``.
+
+    pymed clients send all requests through ``_get``, so that is where the
+    token is taken. Clients without it (``FakePubMed``) answer a query in one
+    round trip and are charged once up front.
+    """
+    get = getattr(client, "_get", None)
+    if get is None:
+        bucket.acquire()
+        return client
+
+    def _get(*args, **kwargs):
+        bucket.acquire()
+        return get(*args, **kwargs)
+
+    client._get = _get
+    return client
+
+
+def query_with_retry(client_factory, bucket, query, max_results, retries, backoff, start=0, where="evidence_refresh"):
+    """One page of records, retried with backoff; returns ``(records, attempts, error)``.
+
+    Failures are counted in the error metric under ``where``.
+    """
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            client = metered(client_factory(), bucket)
+            records = [article_to_record(a) for a in query_page(client, query, start, max_results)]
+            return records, attempts, None
+        except Exception as exc:
+            metrics.error(where, exc)
+            if attempts > retries:
+                return [], attempts, f"{type(exc).__name__}: {exc}"
+            # Exponential backoff with jitter so retries from many keys do not line up.
+            time.sleep(backoff * (2 ** (attempts - 1)) * (0.5 + random.random()))
+
+
+def refresh_evidence(evidence, client_factory=make_client, rate=DEFAULT_RATE, max_workers=8,
+                     max_results=10, newest=3, retries=3, backoff=0.5, cache=None):
+    """Queries PubMed for every entry of ``evidence`` concurrently.
+
+    Returns ``(articles, report)``: ``articles`` maps each key to its ``newest``
+    articles (newest first); ``report`` holds per-key latency, attempts and
+    errors plus overall wall time, HTTP requests (as charged to the token
+    bucket, so retries and extra efetch pages count) and throughput. When a
+    ``PubMedCache`` is given, each fresh result is also stored there.
+    """
+    bucket = TokenBucket(rate)
+    jobs = {key: entry["Query"] for key, entry in evidence.items() if entry.get("Query")}
+
+    def run(key):
+        started = time.perf_counter()
+        records, attempts, error = query_with_retry(client_factory, bucket, jobs[key], max_results, retries, backoff)
+        latency = time.perf_counter() - started
+        if cache is not None and error is None:
+            cache.put(jobs[key], max_results, records)
+        records = sorted(records, key=lambda r: r["Date"], reverse=True)[:newest]
+        return key, records, {"query": jobs[key], "latency_s": latency, "attempts": attempts,
+                              "articles": len(records), "error": error}
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as pool:
+        results = list(pool.map(run, jobs))
+    wall = time.perf_counter() - started
+
+    articles = {key: records for key, records, _ in results}
+    per_key = {key: stats for key, _, stats in results}
+    report = {
+        "keys": per_key,
+        "wall_s": wall,
+        "sum_latency_s": sum(s["latency_s"] for s in per_key.values()),
+        "max_latency_s": max((s["latency_s"] for s in per_key.values()), default=0.0),
+        "attempts": sum(s["attempts"] for s in per_key.values()),
+        "requests": bucket.acquired,
+        "throughput_rps": bucket.acquired / wall if wall else 0.0,
+        "errors": sum(1 for s in per_key.values() if s["error"]),
+    }
+    return articles, report
+
+
+def format_report(report):
+    lines = [f"{'key':<20} {'latency':>9} {'tries':>5} {'n':>3}  error"]
+    for key, s in sorted(report["keys"].items(), key=lambda kv: -kv[1]["latency_s"]):
+        lines.append(f"{key:<20} {s['latency_s']:>8.3f}s {s['attempts']:>5} {s['articles']:>3}  {s['error'] or ''}")
+    lines.append(f"wall {report['wall_s']:.3f}s (sum of latencies {report['sum_latency_s']:.3f}s, "
+                 f"slowest {report['max_latency_s']:.3f}s), {report['attempts']} attempts, {report['requests']} requests, "
+                 f"{report['throughput_rps']:.2f} req/s, {report['errors']} errors")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    from evidence import EvidenceStore
+    _, rep = refresh_evidence(EvidenceStore().entries)
+    print(format_report(rep))
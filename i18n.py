@@ -0,0 +1,71 @@
+"""Catalog-backed translations.
+
+Every UI string has a message id (``"prep.title"``, ``"nav.search"``, ...).
+Each language has a flat JSON catalog in ``locales/<code>.json``. A catalog is
+loaded the first time its language is used and compiled into a single dict
+with the English fallback already merged in, so a lookup is one dict access
+and memory grows only with the languages actually selected.
+
+    tr = translator("Deutsch")
+    st.title(tr("prep.title"))
+"""
+import json
+import os
+import sys
+import threading
+
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+FALLBACK = "en"
+
+# Selector label -> catalog code, in menu order.
+LANGUAGES = {
+    "Deutsch": "de",
+    "English": "en",
+    "Español": "es",
+    "Français": "fr",
+}
+
+
+class Catalog(dict):
+    """Compiled message table; unknown ids render as the id itself."""
+
+    def __missing__(self, message_id):
+        return message_id
+
+
+_catalogs = {}
+_lock = threading.Lock()
+
+
+def _read(code):
+    with open(os.path.join(LOCALES_DIR, f"{code}.json"), encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def messages(code):
+    """Raw messages of one catalog, without the English fallback."""
+    return _read(code)
+
+
+def catalog(code):
+    """Compiled catalog for ``code``, loaded on first use."""
+    compiled = _catalogs.get(code)
+    if compiled is not None:
+        return compiled
+    with _lock:
+        compiled = _catalogs.get(code)
+        if compiled is None:
+            messages = _read(FALLBACK) if code != FALLBACK else {}
+            messages.update(_read(code))
+            compiled = Catalog((sys.intern(k), v) for k, v in messages.items())
+            _catalogs[code] = compiled
+    return compiled
+
+
+def translator(lang):
+    """Lookup function for a selector label ("Deutsch") or catalog code ("de")."""
+    return catalog(LANGUAGES.get(lang, lang)).__getitem__
+
+
+def loaded_languages():
+    return sorted(_catalogs)
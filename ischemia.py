@@ -0,0 +1,211 @@
+"""Monte Carlo timing of the RDN/RAKT workflows for OR planning.
+
+Every step of the donor (RDN) and recipient (RAKT) workflow diagrams gets a
+triangular duration distribution in ``content/workflow_timing.json``, plus
+steps that are not drawn (cold flush, back-table preparation). The recipient
+OR starts ``offset`` minutes after the donor incision. Docking the kidney
+waits until the back table is done, so each simulated procedure is a paired
+donor/recipient schedule.
+
+Intervals are measured between step boundaries and tie back to the
+timing-critical edges of the diagrams:
+
+* bolus to clip ("3-5 min vor/pre Clip"),
+* warm ischemia from clamping to cold flush ("Warm Ischemia Start"),
+* cold ischemia until docking,
+* docking to cooling ("Time critical"),
+* anastomosis time, and reperfusion bolus to unclamp ("Pre-Unclamp").
+
+Procedures are simulated in chunks of ``CHUNK`` as NumPy arrays. The chunks
+run on a process pool, and each returns fixed-bin histograms, so results
+merge exactly and do not depend on the number of workers.
+
+    python ischemia.py                              # 1M procedures per offset, 0-120 min
+    python ischemia.py -n 5000000 --offsets 45 60 --workers 4 --json
+    python ischemia.py --bench 1000000 --budget-s 5
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from startup import LazyModule
+from workflows import WORKFLOWS
+
+np = LazyModule("numpy")
+
+DEFAULT_TIMING = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content", "workflow_timing.json")
+
+DEFAULT_OFFSETS = (0, 30, 60, 90, 120)
+CHUNK = 250_000
+BIN_MIN = 0.1      # histogram resolution in minutes
+MAX_MIN = 720.0    # longer intervals land in the last bin
+QUANTILES = (0.05, 0.5, 0.95)
+
+
+def load_timing(path=DEFAULT_TIMING):
+    """Timing model; every node of a workflow diagram must have a duration."""
+    with open(path, encoding="utf-8") as fh:
+        timing = json.load(fh)
+    for workflow_id, steps in timing["steps"].items():
+        timed = {step["node"] for step in steps}
+        missing = [node for node, _, _ in WORKFLOWS[workflow_id]["nodes"] if node not in timed]
+        if missing:
+            raise ValueError(f"{workflow_id}: no duration for workflow steps {missing}")
+    return timing
+
+
+def _boundary(ref):
+    """``"rdn:E.start"`` -> ``("rdn", "E", 0)``; 0 is the start, 1 the end of a step."""
+    workflow_id, step = ref.split(":", 1)
+    node, edge = step.rsplit(".", 1)
+    return workflow_id, node, {"start": 0, "end": 1}[edge]
+
+
+# --- SIMULATION ---
+def simulate_chunk(timing, n, offset, seed):
+    """Simulates ``n`` paired procedures; returns per-interval histogram, sum and in-target count."""
+    rng = np.random.default_rng(seed)
+    bounds = {}  # (workflow, node) -> (start, end) arrays in minutes after the donor incision
+    for workflow_id, steps in timing["steps"].items():
+        clock = np.full(n, offset if workflow_id == "rakt" else 0.0)
+        for step in steps:
+            start = clock
+            if "waits_for" in step:
+                workflow, node, edge = _boundary(step["waits_for"])
+                start = np.maximum(clock, bounds[workflow, node][edge])
+            clock = start + rng.triangular(step["min"], step["mode"], step["max"], n)
+            bounds[workflow_id, step["node"]] = (start, clock)
+
+    bins = int(MAX_MIN / BIN_MIN) + 1
+    result = {}
+    for interval in timing["intervals"]:
+        workflow, node, edge = _boundary(interval["from"])
+        begin = bounds[workflow, node][edge]
+        workflow, node, edge = _boundary(interval["to"])
+        minutes = bounds[workflow, node][edge] - begin
+        slots = np.minimum((minutes / BIN_MIN).astype(np.int64), bins - 1)
+        low, high = interval.get("target", (None, None))
+        result[interval["id"]] = {
+            "hist": np.bincount(slots, minlength=bins),
+            "sum": float(minutes.sum()),
+            "in_target": int(((minutes >= low) & (minutes <= high)).sum()) if low is not None else None,
+        }
+    return result
+
+
+def _merge(total, part):
+    if total is None:
+        return part
+    for interval_id, stats in part.items():
+        merged = total[interval_id]
+        merged["hist"] = merged["hist"] + stats["hist"]
+        merged["sum"] += stats["sum"]
+        if merged["in_target"] is not None:
+            merged["in_target"] += stats["in_target"]
+    return total
+
+
+def simulate(n=1_000_000, offsets=DEFAULT_OFFSETS, workers=None, seed=0, timing=None):
+    """``n`` paired procedures per recipient start offset; returns ``{offset: {interval: stats}}``.
+
+    The chunks of all offsets run on ``workers`` processes (default: one per
+    CPU; 1 runs inline).
+    """
+    timing = timing or load_timing()
+    tasks = [(offset, min(CHUNK, n - start)) for offset in offsets for start in range(0, n, CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    results = {offset: None for offset in offsets}
+    if workers <= 1:
+        for (offset, size), child in zip(tasks, seeds):
+            results[offset] = _merge(results[offset], simulate_chunk(timing, size, offset, child))
+        return results
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(simulate_chunk, timing, size, offset, child) for (offset, size), child in zip(tasks, seeds)]
+        for (offset, _), future in zip(tasks, futures):
+            results[offset] = _merge(results[offset], future.result())
+    return results
+
+
+# --- SUMMARY ---
+def _quantile(hist, q):
+    """Upper edge of the bin holding quantile ``q``, in minutes."""
+    cumulative = np.cumsum(hist)
+    return (int(np.searchsorted(cumulative, q * cumulative[-1])) + 1) * BIN_MIN
+
+
+def summarize(results, timing=None):
+    """One row per offset and interval: mean, P5/P50/P95 (minutes) and share within the target."""
+    timing = timing or load_timing()
+    rows = []
+    for offset, stats in results.items():
+        for interval in timing["intervals"]:
+            s = stats[interval["id"]]
+            count = int(s["hist"].sum())
+            row = {"offset": offset, "interval": interval["id"], "n": count, "mean": s["sum"] / count}
+            row.update({f"p{round(q * 100)}": _quantile(s["hist"], q) for q in QUANTILES})
+            row["in_target"] = s["in_target"] / count if s["in_target"] is not None else None
+            rows.append(row)
+    return rows
+
+
+def interval_workflows(interval):
+    """Workflow ids an interval reads from."""
+    return {_boundary(interval["from"])[0], _boundary(interval["to"])[0]}
+
+
+# --- BENCHMARK ---
+def benchmark(n=1_000_000, offsets=(60,), workers=None, seed=0):
+    """Best of three timings of ``n`` procedures per offset."""
+    timing = load_timing()
+    best = None
+    for _ in range(3):
+        started = time.perf_counter()
+        simulate(n, offsets, workers, seed, timing)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    procedures = n * len(offsets)
+    return {"procedures": procedures, "workers": workers or os.cpu_count(), "wall_s": best,
+            "procedures_per_s": procedures / best}
+
+
+def format_summary(rows, timing):
+    labels = {i["id"]: i["label"]["English"] for i in timing["intervals"]}
+    lines = [f"{'offset':>6}  {'interval':<38}{'mean':>7}{'P5':>7}{'P50':>7}{'P95':>7}{'target':>8}"]
+    for r in rows:
+        target = f"{r['in_target']:.0%}" if r["in_target"] is not None else "-"
+        lines.append(f"{r['offset']:>6}  {labels[r['interval']]:<38}{r['mean']:>7.1f}{r['p5']:>7.1f}"
+                     f"{r['p50']:>7.1f}{r['p95']:>7.1f}{target:>8}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo warm/cold ischemia times of paired RDN/RAKT procedures.")
+    parser.add_argument("-n", type=int, default=1_000_000, help="procedures per offset")
+    parser.add_argument("--offsets", type=float, nargs="+", default=list(DEFAULT_OFFSETS),
+                        help="recipient incision, minutes after the donor incision")
+    parser.add_argument("--workers", type=int, help="processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bench", type=int, metavar="N", help="time N procedures instead")
+    parser.add_argument("--budget-s", type=float, help="with --bench: exit 1 if slower than this")
+    parser.add_argument("--json", action="store_true", help="print machine-readable output")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        result = benchmark(args.bench, workers=args.workers, seed=args.seed)
+        print(json.dumps(result, indent=2) if args.json else
+              f"{result['procedures']} procedures in {result['wall_s']:.2f} s with {result['workers']} workers "
+              f"({result['procedures_per_s'] / 1e6:.2f} M/s)")
+        return 1 if args.budget_s is not None and result["wall_s"] > args.budget_s else 0
+
+    timing = load_timing()
+    rows = summarize(simulate(args.n, args.offsets, args.workers, args.seed, timing), timing)
+    print(json.dumps(rows, indent=2) if args.json else format_summary(rows, timing))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
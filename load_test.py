@@ -0,0 +1,291 @@
+"""Concurrent-session load generator for KidneyTx.py.
+
+Starts the app with ``streamlit run`` (PubMed stubbed with ``NTX_PUBMED=fake``)
+and opens N websocket sessions that behave like clinicians: they navigate
+the sidebar, switch language now and then and run literature searches. Each
+interaction is one rerun of the whole script; its latency is measured from
+sending the widget state to the server's ``script_finished``.
+
+The run steps through increasing session counts and reports, per level,
+throughput, p50/p95/p99 rerun latency and the server's memory per open
+session, plus the level where throughput stops growing (saturation).
+
+    python load_test.py                          # 1, 2, 4, 8, 16 sessions, 10 s each
+    python load_test.py --sessions 1 8 32 --duration 20 --think-ms 500
+    python load_test.py --url ws://host:8501 --json   # against a running server
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from startup import APP
+
+LANGUAGE_LABEL = "Language / Sprache"
+NAVIGATION_LABEL = "Navigation"
+NAV_IDS = ["nav.dashboard", "nav.prep", "nav.deceased", "nav.living", "nav.recipient", "nav.followup", "nav.search"]
+QUERIES = [
+    "robotic kidney transplantation",
+    "dd-cfDNA rejection",
+    "hypothermic machine perfusion",
+    "living donor nephrectomy",
+    "tacrolimus",
+]
+
+# Action mix of a simulated user: (action, weight)
+ACTIONS = [("navigate", 0.7), ("language", 0.1), ("search", 0.2)]
+
+RERUN_TIMEOUT = 60.0
+SATURATION_SHARE = 0.9  # the knee: fewest sessions reaching 90% of the peak throughput
+
+
+# --- SERVER ---
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app=APP, port=None, timeout=60):
+    """``streamlit run`` in a subprocess; returns (process, websocket URL) once healthy."""
+    port = port or _free_port()
+    env = dict(os.environ)
+    env.setdefault("NTX_PUBMED", "fake")
+    env.setdefault("NTX_CACHE_DIR", tempfile.mkdtemp(prefix="ntx_load_"))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app, "--server.headless", "true", "--server.port", str(port),
+         "--browser.gatherUsageStats", "false"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as resp:
+                if resp.status == 200:
+                    return proc, f"ws://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("streamlit server did not become healthy")
+
+
+def rss_mib(pid):
+    """Resident memory of ``pid`` in MiB (Linux /proc; None elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+# --- SESSIONS ---
+class Session:
+    """One browser tab: a websocket plus the widget ids of its last run."""
+
+    def __init__(self, url, rng):
+        self.url = url
+        self.rng = rng
+        self.ws = None
+        self.widgets = {}
+        self.lang = "Deutsch"
+        self.page = "nav.dashboard"
+        self.latencies = []
+        self.errors = 0
+
+    async def open(self):
+        import websockets
+
+        self.ws = await websockets.connect(f"{self.url}/_stcore/stream", subprotocols=["streamlit"], max_size=None)
+        await self.rerun({})
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def rerun(self, values, triggers=()):
+        """Sends widget values (by label) and waits for the run to finish; returns latency in s."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.SetInParent()
+        for label, value in values.items():
+            if label in self.widgets:
+                state = msg.rerun_script.widget_states.widgets.add()
+                state.id = self.widgets[label]
+                state.string_value = value
+        for label in triggers:
+            if label in self.widgets:
+                state = msg.rerun_script.widget_states.widgets.add()
+                state.id = self.widgets[label]
+                state.trigger_value = True
+
+        started = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        widgets = {}
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await asyncio.wait_for(self.ws.recv(), RERUN_TIMEOUT))
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                widget = element.WhichOneof("type")
+                if widget == "exception":
+                    self.errors += 1
+                elif widget in ("radio", "selectbox", "text_input", "button"):
+                    proto = getattr(element, widget)
+                    widgets[proto.label] = proto.id
+            elif kind == "script_finished":
+                if fwd.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                break
+        latency = time.perf_counter() - started
+        self.widgets = widgets
+        return latency
+
+    async def step(self):
+        """One user action; records the latency of every rerun it causes."""
+        from i18n import LANGUAGES, translator
+
+        tr = translator(self.lang)
+        action = self.rng.choices([a for a, _ in ACTIONS], [w for _, w in ACTIONS])[0]
+        if action == "language":
+            self.lang = self.rng.choice([lang for lang in LANGUAGES if lang != self.lang])
+            # New options give the navigation radio a new id, so the page resets to the Dashboard.
+            self.page = "nav.dashboard"
+            self.latencies.append(await self.rerun({LANGUAGE_LABEL: self.lang}))
+            return
+        if action == "search":
+            if self.page != "nav.search":
+                self.page = "nav.search"
+                self.latencies.append(await self.rerun({LANGUAGE_LABEL: self.lang, NAVIGATION_LABEL: tr(self.page)}))
+            self.latencies.append(await self.rerun(
+                {LANGUAGE_LABEL: self.lang, NAVIGATION_LABEL: tr(self.page), tr("search.query"): self.rng.choice(QUERIES)},
+                triggers=[tr("search.button")]))
+            return
+        self.page = self.rng.choice(NAV_IDS)
+        self.latencies.append(await self.rerun({LANGUAGE_LABEL: self.lang, NAVIGATION_LABEL: tr(self.page)}))
+
+
+async def warm_up(url):
+    """Visits every page in every language once, so imports and shared caches are not measured."""
+    from i18n import LANGUAGES, translator
+
+    user = Session(url, random.Random(0))
+    await user.open()
+    for lang in LANGUAGES:
+        await user.rerun({LANGUAGE_LABEL: lang})
+        for nav_id in NAV_IDS:
+            await user.rerun({LANGUAGE_LABEL: lang, NAVIGATION_LABEL: translator(lang)(nav_id)})
+    await user.close()
+
+
+async def run_level(url, sessions, duration, think_s=0.0, seed=0, pid=None):
+    """``sessions`` concurrent users for ``duration`` seconds."""
+    rss_before = rss_mib(pid) if pid else None
+    users = [Session(url, random.Random(seed + i)) for i in range(sessions)]
+    await asyncio.gather(*(u.open() for u in users))
+    deadline = time.perf_counter() + duration
+
+    async def loop(user):
+        while time.perf_counter() < deadline:
+            await user.step()
+            if think_s:
+                await asyncio.sleep(user.rng.expovariate(1 / think_s))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(loop(u) for u in users))
+    elapsed = time.perf_counter() - started
+    rss_after = rss_mib(pid) if pid else None
+    await asyncio.gather(*(u.close() for u in users))
+
+    latencies = sorted(ms * 1e3 for u in users for ms in u.latencies)
+    result = {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "errors": sum(u.errors for u in users),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "p99_ms": _percentile(latencies, 99),
+        "rss_mib": rss_after,
+        "mib_per_session": (rss_after - rss_before) / sessions if rss_before is not None and rss_after is not None else None,
+    }
+    return result
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return statistics.quantiles(sorted_values, n=100, method="inclusive")[pct - 1]
+
+
+def saturation(levels):
+    """Fewest sessions reaching ``SATURATION_SHARE`` of the peak throughput.
+
+    None if that is the highest level measured, i.e. throughput was still growing.
+    """
+    peak = max(r["throughput_rps"] for r in levels)
+    knee = next(r["sessions"] for r in levels if r["throughput_rps"] >= SATURATION_SHARE * peak)
+    return None if knee == levels[-1]["sessions"] else knee
+
+
+def format_report(levels, saturated_at):
+    lines = [f"{'sessions':>8}{'reruns':>8}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'RSS MiB':>9}{'MiB/sess':>10}{'errors':>8}"]
+    for r in levels:
+        per_session = f"{r['mib_per_session']:.1f}" if r["mib_per_session"] is not None else "-"
+        rss = f"{r['rss_mib']:.0f}" if r["rss_mib"] is not None else "-"
+        lines.append(f"{r['sessions']:>8}{r['reruns']:>8}{r['throughput_rps']:>8.1f}{r['p50_ms']:>9.0f}{r['p95_ms']:>9.0f}"
+                     f"{r['p99_ms']:>9.0f}{rss:>9}{per_session:>10}{r['errors']:>8}")
+    if saturated_at is None:
+        lines.append("Throughput still growing at the highest level; add more sessions to find saturation.")
+    else:
+        best = next(r for r in levels if r["sessions"] == saturated_at)
+        lines.append(f"Saturates at ~{saturated_at} concurrent sessions ({best['throughput_rps']:.1f} reruns/s, "
+                     f"p95 {best['p95_ms']:.0f} ms).")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test and capacity report for KidneyTx.py.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between a user's actions")
+    parser.add_argument("--url", help="websocket base URL of a running server (default: start one)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print machine-readable output")
+    args = parser.parse_args(argv)
+
+    proc, url = (None, args.url) if args.url else start_server()
+    try:
+        pid = proc.pid if proc else None
+        asyncio.run(warm_up(url))
+        levels = [asyncio.run(run_level(url, n, args.duration, args.think_ms / 1e3, args.seed, pid))
+                  for n in sorted(args.sessions)]
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    saturated_at = saturation(levels)
+    if args.json:
+        print(json.dumps({"levels": levels, "saturates_at": saturated_at}, indent=2))
+    else:
+        print(format_report(levels, saturated_at))
+    return 1 if any(r["errors"] for r in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""Low-overhead runtime metrics.
+
+One process-wide registry of counters and fixed-bucket histograms, shared by
+all sessions. Recording is a ``perf_counter`` call plus a dict update under a
+lock (about a microsecond), so instrumentation stays on in production.
+
+    with metrics.timer("workflow_render_seconds", workflow="rdn"):
+        ...
+    metrics.inc("chart_cache_total", result="hit")
+
+Exposure:
+
+* ``NTX_ADMIN=1`` shows a metrics panel in the app sidebar,
+* ``NTX_METRICS_FILE=/path/ntx.prom`` writes the Prometheus text format there
+  (at most every ``NTX_METRICS_INTERVAL`` seconds, default 15), e.g. for the
+  node_exporter textfile collector,
+* ``NTX_METRICS_PORT=9464`` serves it on ``http://localhost:9464/metrics``.
+
+Errors that are handled (a failed PubMed fetch served from cache, Graphviz
+missing, ...) go through ``error()``: they are counted per site and logged
+instead of disappearing silently.
+"""
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+
+PANEL = os.environ.get("NTX_ADMIN", "") not in ("", "0")
+EXPORT_FILE = os.environ.get("NTX_METRICS_FILE")
+EXPORT_PORT = int(os.environ.get("NTX_METRICS_PORT", "0") or 0)
+EXPORT_INTERVAL = float(os.environ.get("NTX_METRICS_INTERVAL", "15"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help); every metric recorded anywhere is declared here.
+METRICS = {
+    "page_render_seconds": ("histogram", "Script run time per page and language."),
+    "evidence_badge_seconds": ("histogram", "Time to look up and render one evidence badge."),
+    "content_build_seconds": ("histogram", "Time to build all content DataFrames from the data file."),
+    "workflow_render_seconds": ("histogram", "Time to show one workflow diagram."),
+    "workflow_svg_total": ("counter", "Workflow SVG lookups by source (memory, disk, layout, unavailable)."),
+    "chart_render_seconds": ("histogram", "Time to draw and encode one chart."),
+    "chart_cache_total": ("counter", "Biomarker chart cache lookups by result."),
+    "pubmed_get_seconds": ("histogram", "Time to answer one PubMed lookup, cache included."),
+    "pubmed_first_result_seconds": ("histogram", "Time from starting a PubMed result stream to its first article."),
+    "pubmed_fetch_seconds": ("histogram", "Latency of PubMed requests that went to the network."),
+    "pubmed_cache_total": ("counter", "PubMed cache lookups by result (hit, stale, miss)."),
+    "errors_total": ("counter", "Handled errors by site."),
+}
+
+log = logging.getLogger("ntx")
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count], sum
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+# --- RECORDING ---
+def inc(name, amount=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    key = _key(name, labels)
+    slot = bisect.bisect_left(LATENCY_BUCKETS, value)
+    with _lock:
+        entry = _histograms.get(key)
+        if entry is None:
+            entry = _histograms[key] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0]
+        entry[0][slot] += 1
+        entry[1] += value
+
+
+class timer:
+    """Context manager (and decorator) observing the elapsed seconds into a histogram."""
+
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+    def __call__(self, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(self.name, **self.labels):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+def error(where, exc=None):
+    """Counts and logs a handled error."""
+    inc("errors_total", where=where)
+    log.warning("%s failed: %r", where, exc, exc_info=exc is not None and log.isEnabledFor(logging.DEBUG))
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+# --- READING ---
+def _quantile(counts, q):
+    """Upper bucket bound containing quantile ``q`` (inf if it falls in the overflow bucket)."""
+    total = sum(counts)
+    if not total:
+        return None
+    rank, seen = q * total, 0
+    for bound, n in zip(LATENCY_BUCKETS + (float("inf"),), counts):
+        seen += n
+        if seen >= rank:
+            return bound
+    return float("inf")
+
+
+def snapshot():
+    """Counters and histogram summaries as plain rows, for the admin panel."""
+    with _lock:
+        counters = [(k, v) for k, v in _counters.items()]
+        histograms = [(k, list(e[0]), e[1]) for k, e in _histograms.items()]
+    return {
+        "counters": [{"metric": name, "labels": _format_labels(labels), "value": value}
+                     for (name, labels), value in sorted(counters)],
+        "histograms": [{"metric": name, "labels": _format_labels(labels), "count": sum(counts),
+                        "mean_ms": total / sum(counts) * 1e3, "p95_ms_le": _quantile(counts, 0.95) * 1e3}
+                       for (name, labels), counts, total in sorted(histograms)],
+    }
+
+
+def ratio(name, numerator, **labels):
+    """Share of ``name`` counts whose ``result`` label is in ``numerator`` (None without data)."""
+    with _lock:
+        rows = [(dict(key[1]), value) for key, value in _counters.items() if key[0] == name]
+    rows = [(l, v) for l, v in rows if all(l.get(k) == val for k, val in labels.items())]
+    total = sum(v for _, v in rows)
+    if not total:
+        return None
+    return sum(v for l, v in rows if l.get("result") in numerator) / total
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((k, (list(e[0]), e[1])) for k, e in _histograms.items())
+    lines = []
+    declared = set()
+
+    def header(name):
+        if name not in declared:
+            declared.add(name)
+            kind, help_text = METRICS.get(name, ("untyped", ""))
+            lines.append(f"# HELP ntx_{name} {help_text}")
+            lines.append(f"# TYPE ntx_{name} {kind}")
+
+    for (name, labels), value in counters:
+        header(name)
+        lines.append(f"ntx_{name}{_format_labels(labels)} {value}")
+    for (name, labels), (counts, total) in histograms:
+        header(name)
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS + (float("inf"),), counts):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"ntx_{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+        lines.append(f"ntx_{name}_sum{_format_labels(labels)} {total}")
+        lines.append(f"ntx_{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+# --- EXPORT ---
+_last_export = 0.0
+_server = None
+
+
+def write_file(path):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(render_prometheus())
+    os.replace(tmp, path)
+
+
+def serve(port):
+    """Serves ``/metrics`` on ``port`` from a daemon thread (once per process)."""
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _lock:
+        if _server is not None:
+            return _server
+        _server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=_server.serve_forever, name="ntx-metrics", daemon=True).start()
+    return _server
+
+
+def maybe_export():
+    """Called once per rerun: starts the endpoint and refreshes the file when configured."""
+    global _last_export, _server
+    if EXPORT_PORT and _server is None:
+        try:
+            serve(EXPORT_PORT)
+        except OSError as exc:  # e.g. another worker already owns the port; don't retry every rerun
+            _server = False
+            error("metrics_serve", exc)
+    if EXPORT_FILE:
+        now = time.monotonic()
+        if now - _last_export >= EXPORT_INTERVAL:
+            _last_export = now
+            try:
+                write_file(EXPORT_FILE)
+            except OSError as exc:
+                error("metrics_file", exc)
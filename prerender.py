@@ -0,0 +1,459 @@
+"""Static pre-render of the read-only pages.
+
+Every page except Search only varies by language, so it can be served as plain
+HTML from a static file server instead of a live Streamlit session (a script
+run and a websocket per reader). This runs each page × language of
+KidneyTx.py headlessly with ``AppTest`` and converts the element tree to HTML:
+tabs become sections, expanders ``<details>``, tables ``<table>``. Workflow
+SVGs and the biomarker chart are written once to ``media/``, named by content
+hash. Widgets (uploaders, sliders, date inputs) and the Search page link into
+the live app at ``--live-url``, which opens on the same page and language via
+``?lang=<code>&page=<key>``.
+
+Pages are rendered in parallel on a process pool (one AppTest run at a time
+per process). ``manifest.json`` records the hash of every source file a page
+depends on: the app modules, the content data files, the literature digest,
+and its language's catalog plus the English fallback. A rebuild only
+re-renders pages whose sources changed. For example, editing
+``locales/fr.json`` re-renders the six French pages and nothing else.
+
+    python prerender.py                       # incremental build into ./site
+    python prerender.py --out /srv/ntx --live-url https://ntx.example.org/app/ --workers 8
+    python prerender.py --force --json        # re-render everything, machine-readable report
+"""
+import argparse
+import base64
+import glob
+import hashlib
+import html
+import json
+import mimetypes
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from startup import APP
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUT = os.path.join(ROOT, "site")
+DEFAULT_LIVE_URL = "/app/"
+MANIFEST = "manifest.json"
+
+# Navigation keys of KidneyTx.py and the message id of their radio label; Search stays live.
+PAGES = {
+    "Dashboard": "nav.dashboard",
+    "Prep": "nav.prep",
+    "Deceased": "nav.deceased",
+    "Living": "nav.living",
+    "Recipient": "nav.recipient",
+    "FollowUp": "nav.followup",
+}
+LIVE_PAGES = {"Search": "nav.search"}
+
+WIDGETS = {
+    "button", "checkbox", "color_picker", "date_input", "download_button", "file_uploader", "multiselect",
+    "number_input", "radio", "select_slider", "selectbox", "slider", "text_area", "text_input", "time_input",
+    "toggle",
+}
+ALERTS = {"info", "success", "warning", "error"}
+
+STYLE = """\
+body { margin: 0; display: flex; font-family: "Source Sans Pro", sans-serif; color: #31333f; line-height: 1.5; }
+nav.sidebar { width: 16rem; flex: none; min-height: 100vh; padding: 1rem 1.5rem; background: #f0f2f6; }
+nav.sidebar ul { list-style: none; padding: 0; }
+nav.sidebar li { margin: .35rem 0; }
+nav.sidebar .current { font-weight: 600; }
+main { flex: 1; min-width: 0; padding: 2rem 3rem; }
+section.tab { border-top: 1px solid #e6e9ef; margin-top: 1.5rem; }
+.columns { display: flex; gap: 1.5rem; }
+.column { min-width: 0; }
+.alert { padding: .75rem 1rem; border-radius: .5rem; margin: .5rem 0; }
+.alert-info { background: #e8f0fe; } .alert-success { background: #e6f4ea; }
+.alert-warning { background: #fef7e0; } .alert-error { background: #fce8e6; }
+.alert .icon { float: left; margin-right: .5rem; }
+.caption { color: #808495; font-size: .875rem; }
+.metric { display: inline-block; margin: 0 2rem .5rem 0; color: #808495; } .metric strong { color: #262730; font-size: 1.75rem; }
+.live { font-size: .875rem; }
+details { border: 1px solid #e6e9ef; border-radius: .5rem; padding: .5rem 1rem; margin: .75rem 0; }
+summary { cursor: pointer; }
+table { border-collapse: collapse; margin: .75rem 0; }
+th, td { border: 1px solid #e6e9ef; padding: .25rem .5rem; text-align: left; vertical-align: top; }
+pre { background: #f0f2f6; padding: .75rem 1rem; border-radius: .5rem; overflow-x: auto; }
+img { max-width: 100%; }
+"""
+
+
+def page_file(page):
+    return f"{page.lower()}.html"
+
+
+def live_link(live_url, code, page):
+    return f"{live_url}?lang={code}&page={page}"
+
+
+# --- MARKDOWN (the subset the catalogs use; raw HTML is escaped like st.markdown does) ---
+_HEADING = re.compile(r"(#{1,6})\s+(.*)")
+_LIST_ITEM = re.compile(r"(\d+\.|[-*])\s+(.*)")
+_INLINE = [
+    (re.compile(r"\*\*(.+?)\*\*"), r"<strong>\1</strong>"),
+    (re.compile(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])"), r"<em>\1</em>"),
+    (re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)"), r'<a href="\2">\1</a>'),
+]
+
+
+def inline(text):
+    parts = re.split(r"(`[^`]+`)", text)
+    for i, part in enumerate(parts):
+        if i % 2:
+            parts[i] = f"<code>{html.escape(part[1:-1])}</code>"
+        else:
+            part = html.escape(part)
+            for pattern, repl in _INLINE:
+                part = pattern.sub(repl, part)
+            parts[i] = part
+    return "".join(parts)
+
+
+def markdown(text):
+    blocks, para, items = [], [], []
+    list_tag = None
+
+    def flush_para():
+        if para:
+            blocks.append(f"<p>{' '.join(para)}</p>")
+            para.clear()
+
+    def flush_list():
+        if items:
+            blocks.append(f"<{list_tag}>" + "".join(f"<li>{item}</li>" for item in items) + f"</{list_tag}>")
+            items.clear()
+
+    for line in text.split("\n"):
+        stripped = line.strip()
+        heading = _HEADING.fullmatch(stripped)
+        item = _LIST_ITEM.fullmatch(stripped)
+        if not stripped:
+            flush_para()
+            flush_list()
+        elif stripped in ("---", "***", "___"):
+            flush_para()
+            flush_list()
+            blocks.append("<hr>")
+        elif heading:
+            flush_para()
+            flush_list()
+            level = len(heading.group(1))
+            blocks.append(f"<h{level}>{inline(heading.group(2))}</h{level}>")
+        elif item:
+            flush_para()
+            tag = "ol" if item.group(1)[0].isdigit() else "ul"
+            if tag != list_tag:
+                flush_list()
+                list_tag = tag
+            items.append(inline(item.group(2)))
+        else:
+            flush_list()
+            para.append(inline(stripped))
+    flush_para()
+    flush_list()
+    return "\n".join(blocks)
+
+
+# --- ELEMENT TREE -> HTML ---
+class PageWriter:
+    """Converts one AppTest element tree to HTML, collecting the media it references."""
+
+    def __init__(self, tr, live_href, media_files):
+        self.tr = tr
+        self.live_href = live_href
+        self.media_files = media_files  # AppTest media URL -> (bytes, mimetype)
+        self.media = {}  # file name -> bytes
+
+    def render(self, node):
+        return "\n".join(filter(None, (self.element(child) for child in _children(node))))
+
+    def element(self, node):
+        kind = node.type
+        if kind == "tab_container":
+            return self.render(node)
+        if kind == "tab":
+            return f'<section class="tab"><h2>{html.escape(node.label)}</h2>\n{self.render(node)}\n</section>'
+        if kind == "expander":
+            return f"<details><summary>{inline(node.label)}</summary>\n{self.render(node)}\n</details>"
+        if kind == "flex_container" and all(c.type == "column" for c in _children(node)):
+            return f'<div class="columns">\n{self.render(node)}\n</div>'
+        if kind == "column":
+            return f'<div class="column" style="flex: {node.weight or 1}">\n{self.render(node)}\n</div>'
+        if kind in ("title", "header", "subheader"):
+            level = {"title": 1, "header": 2, "subheader": 3}[kind]
+            return f"<h{level}>{inline(node.value)}</h{level}>"
+        if kind == "divider":
+            return "<hr>"
+        if kind == "markdown":
+            return markdown(node.value)
+        if kind == "caption":
+            return f'<div class="caption">{markdown(node.value)}</div>'
+        if kind in ALERTS:
+            icon = f'<span class="icon">{html.escape(node.icon)}</span>' if node.icon else ""
+            return f'<div class="alert alert-{kind}">{icon}{markdown(node.value)}</div>'
+        if kind == "code":
+            return f"<pre><code>{html.escape(node.value)}</code></pre>"
+        if kind == "metric":
+            return f'<div class="metric">{inline(node.label)}<br><strong>{html.escape(node.value)}</strong></div>'
+        if kind in ("table", "dataframe"):
+            frame = node.value
+            return frame.to_html(border=0, index=type(frame.index).__name__ != "RangeIndex")
+        if kind == "image":
+            return "\n".join(self.image(img) for img in node.proto.imgs)
+        if kind == "graphviz_chart":
+            # Graphviz was not available to lay the diagram out; keep its source readable.
+            return f'<pre class="dot">{html.escape(node.proto.spec)}</pre>'
+        if kind in WIDGETS:
+            return (f'<p class="live"><a href="{html.escape(self.live_href)}">{inline(node.label)}</a>'
+                    f" – {html.escape(self.tr('static.live_only'))}</p>")
+        if _children(node):
+            return self.render(node)
+        return f"<!-- {html.escape(kind)} is not pre-rendered -->"
+
+    def image(self, img):
+        if img.url.startswith("data:"):
+            header, payload = img.url[5:].split(",", 1)
+            mimetype = header.split(";")[0]
+            data = base64.b64decode(payload) if header.endswith(";base64") else payload.encode("utf-8")
+        elif img.url in self.media_files:
+            data, mimetype = self.media_files[img.url]
+        else:
+            return f"<!-- missing image {html.escape(img.url)} -->"
+        extension = ".svg" if mimetype == "image/svg+xml" else mimetypes.guess_extension(mimetype) or ""
+        name = hashlib.sha256(data).hexdigest()[:16] + extension
+        self.media[name] = data
+        figure = f'<img src="../media/{name}" alt="">'
+        if img.caption:
+            figure += f'<div class="caption">{inline(img.caption)}</div>'
+        return f"<figure>{figure}</figure>"
+
+
+def _children(node):
+    children = getattr(node, "children", None)
+    return list(children.values()) if children else []
+
+
+def page_html(body, page, lang, live_url):
+    from i18n import LANGUAGES, translator
+
+    tr, code = translator(lang), LANGUAGES[lang]
+    languages = " · ".join(
+        f'<span class="current">{html.escape(name)}</span>' if name == lang
+        else f'<a href="../{other}/{page_file(page)}">{html.escape(name)}</a>'
+        for name, other in LANGUAGES.items())
+    links = [f'<li class="current">{html.escape(tr(msg))}</li>' if key == page
+             else f'<li><a href="{page_file(key)}">{html.escape(tr(msg))}</a></li>' for key, msg in PAGES.items()]
+    links += [f'<li><a href="{html.escape(live_link(live_url, code, key))}">{html.escape(tr(msg))}</a></li>'
+              for key, msg in LIVE_PAGES.items()]
+    return f"""<!DOCTYPE html>
+<html lang="{code}">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>NTX Guide · {html.escape(tr(PAGES[page]))}</title>
+<link rel="stylesheet" href="../style.css">
+</head>
+<body>
+<nav class="sidebar">
+<h2>NTX Sidebar</h2>
+<p>{languages}</p>
+<ul>
+{chr(10).join(links)}
+</ul>
+</nav>
+<main>
+{body}
+</main>
+</body>
+</html>
+"""
+
+
+# --- WORKERS ---
+_media_files = {}  # AppTest media URL -> (bytes, mimetype), for this worker process
+
+
+def _init_worker():
+    """Keeps a copy of every media file AppTest stores; its in-memory storage is dropped after each run."""
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    original = MemoryMediaFileStorage.load_and_get_id
+
+    def load_and_get_id(self, path_or_data, mimetype, kind, filename=None):
+        file_id = original(self, path_or_data, mimetype, kind, filename)
+        if isinstance(path_or_data, str):
+            with open(path_or_data, "rb") as fh:
+                path_or_data = fh.read()
+        _media_files[self.get_url(file_id)] = (bytes(path_or_data), mimetype)
+        return file_id
+
+    MemoryMediaFileStorage.load_and_get_id = load_and_get_id
+
+
+def _dependencies(code):
+    """Source files a page in language ``code`` was rendered from."""
+    import content
+    import digest
+    import evidence
+    import i18n
+
+    paths = {APP, os.path.abspath(__file__), content.DEFAULT_PATH, evidence.DEFAULT_PATH, digest.DEFAULT_PATH,
+             os.path.join(i18n.LOCALES_DIR, f"{i18n.FALLBACK}.json"), os.path.join(i18n.LOCALES_DIR, f"{code}.json")}
+    paths.update(glob.glob(os.path.join(ROOT, "content", "*.json")))
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if path and os.path.dirname(os.path.abspath(path)) == ROOT:
+            paths.add(os.path.abspath(path))
+    return sorted(os.path.relpath(path, ROOT) for path in paths)
+
+
+def render_page(page, lang, live_url):
+    """HTML, media and source files of one page; runs in a worker process."""
+    from streamlit.testing.v1 import AppTest
+    from i18n import LANGUAGES, translator
+
+    started = time.perf_counter()
+    code = LANGUAGES[lang]
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.query_params["lang"] = code
+    at.query_params["page"] = page
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"{page}/{lang}: {at.exception[0].value}")
+    writer = PageWriter(translator(lang), live_link(live_url, code, page), _media_files)
+    body = writer.render(at.main)
+    return {
+        "page": page,
+        "lang": lang,
+        "html": page_html(body, page, lang, live_url),
+        "media": writer.media,
+        "deps": _dependencies(code),
+        "ms": (time.perf_counter() - started) * 1e3,
+    }
+
+
+# --- BUILD ---
+def _digest(path, memo):
+    if path not in memo:
+        try:
+            with open(os.path.join(ROOT, path), "rb") as fh:
+                memo[path] = hashlib.sha256(fh.read()).hexdigest()
+        except OSError:
+            memo[path] = None
+    return memo[path]
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data.encode("utf-8") if isinstance(data, str) else data)
+    os.replace(tmp, path)
+
+
+def load_manifest(out):
+    try:
+        with open(os.path.join(out, MANIFEST), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {"pages": {}}
+
+
+def build(out=DEFAULT_OUT, pages=None, langs=None, live_url=DEFAULT_LIVE_URL, workers=None, force=False):
+    """Renders changed pages into ``out``; returns a report of what was rendered and skipped."""
+    os.environ.setdefault("NTX_PUBMED", "fake")
+    from i18n import LANGUAGES
+
+    pages = list(PAGES) if pages is None else pages
+    langs = list(LANGUAGES) if langs is None else langs
+    started = time.perf_counter()
+    manifest = load_manifest(out)
+    memo = {}
+
+    todo, skipped = [], []
+    for lang in langs:
+        for page in pages:
+            entry = manifest["pages"].get(f"{page}|{lang}")
+            unchanged = (entry is not None and entry["live_url"] == live_url
+                         and os.path.exists(os.path.join(out, entry["file"]))
+                         and all(_digest(path, memo) == digest for path, digest in entry["deps"].items()))
+            if unchanged and not force:
+                skipped.append(f"{page}|{lang}")
+            else:
+                todo.append((page, lang))
+
+    rendered = {}
+    if todo:
+        # Submitted by module name: inside a worker, AppTest replaces __main__ with the app script.
+        from prerender import _init_worker, render_page
+
+        workers = min(workers or os.cpu_count() or 1, len(todo))
+        with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(render_page, page, lang, live_url) for page, lang in todo]
+            for future in as_completed(futures):
+                result = future.result()
+                key, code = f"{result['page']}|{result['lang']}", LANGUAGES[result["lang"]]
+                relative = f"{code}/{page_file(result['page'])}"
+                _write(os.path.join(out, relative), result["html"])
+                for name, data in result["media"].items():
+                    if not os.path.exists(os.path.join(out, "media", name)):
+                        _write(os.path.join(out, "media", name), data)
+                manifest["pages"][key] = {
+                    "file": relative,
+                    "live_url": live_url,
+                    "media": sorted(result["media"]),
+                    "deps": {path: _digest(path, memo) for path in result["deps"]},
+                }
+                rendered[key] = result["ms"]
+
+    first = next(iter(manifest["pages"].values()), None)
+    if first is not None:
+        _write(os.path.join(out, "index.html"),
+               f'<!DOCTYPE html>\n<meta http-equiv="refresh" content="0; url={first["file"]}">\n')
+    _write(os.path.join(out, "style.css"), STYLE)
+    referenced = {name for entry in manifest["pages"].values() for name in entry["media"]}
+    for path in glob.glob(os.path.join(out, "media", "*")):
+        if os.path.basename(path) not in referenced:
+            os.remove(path)
+    _write(os.path.join(out, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+
+    return {
+        "out": out,
+        "workers": workers if todo else 0,
+        "rendered": rendered,
+        "skipped": skipped,
+        "wall_s": time.perf_counter() - started,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-render the read-only pages of KidneyTx.py to static HTML.")
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES))
+    parser.add_argument("--langs", nargs="+")
+    parser.add_argument("--live-url", default=DEFAULT_LIVE_URL, help="base URL of the live app (Search, widgets)")
+    parser.add_argument("--workers", type=int, help="render processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="re-render pages whose sources did not change")
+    parser.add_argument("--json", action="store_true", help="print machine-readable output")
+    args = parser.parse_args(argv)
+
+    report = build(args.out, args.pages, args.langs, args.live_url, args.workers, args.force)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, ms in sorted(report["rendered"].items()):
+            print(f"{key:<22}{ms:>9.0f} ms")
+        print(f"Rendered {len(report['rendered'])} pages, {len(report['skipped'])} unchanged, "
+              f"in {report['wall_s']:.1f} s with {report['workers']} workers -> {report['out']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""Persistent PubMed result cache shared by all sessions and worker processes.
+
+Results live in a small SQLite file (WAL mode, so several Streamlit workers can
+read and write it at once) and are mirrored in an in-process LRU so repeated
+queries are answered without touching disk. Entries older than ``ttl`` are
+still served while a background thread refreshes them; entries older than
+``ttl + stale_ttl`` are fetched synchronously. ``on_records`` is called with
+every freshly fetched or stored result list (used to feed the search index).
+
+Long result lists are read with ``stream``, one page (one cache entry) at a
+time, so the first article costs one page lookup however far a reader pages.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+from pubmed_client import article_to_record, make_client, query_page
+
+DEFAULT_DIR = os.environ.get("NTX_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".ntx_cache"))
+DEFAULT_TTL = float(os.environ.get("NTX_PUBMED_TTL", 24 * 3600))
+DEFAULT_STALE_TTL = float(os.environ.get("NTX_PUBMED_STALE_TTL", 7 * 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("NTX_PUBMED_MAX_ENTRIES", 2000))
+PAGE_SIZE = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pubmed_cache (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL
+)
+"""
+
+
+def normalize_query(query):
+    """Case- and whitespace-insensitive form of a query."""
+    return re.sub(r"\s+", " ", (query or "").strip().lower())
+
+
+def cache_key(query, max_results, start=0):
+    if start:
+        return f"{max_results}@{start}|{normalize_query(query)}"
+    return f"{max_results}|{normalize_query(query)}"
+
+
+class PubMedCache:
+    def __init__(self, path=None, ttl=DEFAULT_TTL, stale_ttl=DEFAULT_STALE_TTL,
+                 max_entries=DEFAULT_MAX_ENTRIES, memory_entries=256, client_factory=make_client, on_records=None):
+        if path is None:
+            os.makedirs(DEFAULT_DIR, exist_ok=True)
+            path = os.path.join(DEFAULT_DIR, "pubmed.sqlite")
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.client_factory = client_factory
+        self.on_records = on_records
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "errors": 0}
+
+        self._memory = OrderedDict()  # key -> (fetched_at, records)
+        self._touched = set()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._connect().execute(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- public API ---
+    def get(self, query, max_results=3, start=0):
+        """Returns a list of article records, from cache when possible."""
+        key = cache_key(query, max_results, start)
+        now = time.time()
+        entry = self._memory_get(key)
+        if entry is None:
+            entry = self._disk_get(key, now)
+        if entry is not None:
+            fetched_at, records = entry
+            age = now - fetched_at
+            if age <= self.ttl:
+                self.stats["hits"] += 1
+                metrics.inc("pubmed_cache_total", result="hit")
+                return records
+            if age <= self.ttl + self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                metrics.inc("pubmed_cache_total", result="stale")
+                self._revalidate(key, query, max_results, start)
+                return records
+        self.stats["misses"] += 1
+        metrics.inc("pubmed_cache_total", result="miss")
+        records = self._fetch(key, query, max_results, start)
+        if records is None:
+            return entry[1] if entry is not None else []
+        return records
+
+    def stream(self, query, start=0, limit=None, page_size=PAGE_SIZE, cancel=None):
+        """Yields article records from position ``start`` on, fetching one page at a time.
+
+        Stops after ``limit`` records, at the end of the results, or as soon as
+        ``cancel`` (a ``threading.Event``) is set. Pages are aligned to
+        ``page_size``, so any cursor maps onto cached pages; the page after the
+        current one is prefetched in the background.
+        """
+        started = time.perf_counter()
+        position, stop = start, None if limit is None else start + limit
+        while stop is None or position < stop:
+            if cancel is not None and cancel.is_set():
+                return
+            page_start = position - position % page_size
+            with metrics.timer("pubmed_get_seconds"):
+                records = self.get(query, max_results=page_size, start=page_start)
+            if len(records) == page_size:
+                self.prefetch(query, page_size, page_start + page_size)
+            for record in records[position - page_start:]:
+                if stop is not None and position >= stop or cancel is not None and cancel.is_set():
+                    return
+                if position == start:
+                    metrics.observe("pubmed_first_result_seconds", time.perf_counter() - started)
+                yield record
+                position += 1
+            if len(records) < page_size:
+                return
+
+    def prefetch(self, query, max_results, start=0):
+        """Fetches an entry in the background unless it is cached already."""
+        key = cache_key(query, max_results, start)
+        if self._memory_get(key) is None and self._disk_get(key, time.time()) is None:
+            self._revalidate(key, query, max_results, start)
+
+    def put(self, query, max_results, records, fetched_at=None):
+        key = cache_key(query, max_results)
+        self._store(key, records, time.time() if fetched_at is None else fetched_at)
+
+    def invalidate(self, query=None, max_results=3):
+        """Drops one entry, or everything when ``query`` is None."""
+        conn = self._connect()
+        with self._lock:
+            if query is None:
+                self._memory.clear()
+                conn.execute("DELETE FROM pubmed_cache")
+            else:
+                key = cache_key(query, max_results)
+                self._memory.pop(key, None)
+                conn.execute("DELETE FROM pubmed_cache WHERE key = ?", (key,))
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM pubmed_cache").fetchone()[0]
+
+    # --- internals ---
+    def _memory_get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._touched.add(key)
+            return entry
+
+    def _memory_put(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _disk_get(self, key, now):
+        conn = self._connect()
+        row = conn.execute("SELECT payload, fetched_at FROM pubmed_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE pubmed_cache SET last_access = ? WHERE key = ?", (now, key))
+        entry = (row[1], json.loads(row[0]))
+        self._memory_put(key, entry)
+        return entry
+
+    def _store(self, key, records, fetched_at):
+        self._memory_put(key, (fetched_at, records))
+        conn = self._connect()
+        with self._lock:
+            touched, self._touched = self._touched, set()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO pubmed_cache (key, payload, fetched_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(records), fetched_at, fetched_at),
+            )
+            # Memory hits never touch disk; flush their access times here so LRU eviction sees them.
+            conn.executemany("UPDATE pubmed_cache SET last_access = ? WHERE key = ?",
+                             [(fetched_at, k) for k in touched if k != key])
+            conn.execute(
+                "DELETE FROM pubmed_cache WHERE key IN ("
+                "SELECT key FROM pubmed_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if self.on_records is not None and records:
+            self.on_records(records)
+
+    def _fetch(self, key, query, max_results, start=0):
+        try:
+            with metrics.timer("pubmed_fetch_seconds"):
+                client = self.client_factory()
+                records = [article_to_record(a) for a in query_page(client, query, start, max_results)]
+        except Exception as exc:
+            # Served from stale data (or empty) by the caller; counted and logged, never silent.
+            self.stats["errors"] += 1
+            metrics.error("pubmed_fetch", exc)
+            return None
+        self._store(key, records, time.time())
+        return records
+
+    def _revalidate(self, key, query, max_results, start=0):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._fetch(key, query, max_results, start)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f"pubmed-revalidate-{key[:32]}", daemon=True).start()
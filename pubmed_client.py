@@ -0,0 +1,122 @@
+"""PubMed client factory and an offline stand-in.
+
+The app talks to PubMed through anything that exposes
+``query(query, max_results)`` and yields pymed-style articles (``title``,
+``abstract``, ``publication_date``, ``pubmed_id``); ``query_page`` adds paging
+on top of it.
+Set ``NTX_PUBMED=fake`` to run the whole app against ``FakePubMed``.
+"""
+import datetime
+import hashlib
+import itertools
+import os
+import re
+import time
+
+PUBMED_TOOL = "StreamlitApp"
+PUBMED_EMAIL = "mail@example.com"
+NCBI_API_KEY = os.environ.get("NCBI_API_KEY")  # raises NCBI's limit from 3 to 10 requests/s
+
+
+def make_client():
+    """Returns the configured PubMed client (real unless NTX_PUBMED=fake)."""
+    if os.environ.get("NTX_PUBMED", "").lower() == "fake":
+        latency = float(os.environ.get("NTX_PUBMED_FAKE_LATENCY", "0"))
+        return FakePubMed(latency=latency)
+    from pymed import PubMed
+    client = PubMed(tool=PUBMED_TOOL, email=PUBMED_EMAIL)
+    if NCBI_API_KEY:
+        client.parameters["api_key"] = NCBI_API_KEY
+        client._rateLimit = 10
+    return client
+
+
+def query_page(client, query, start=0, size=100):
+    """Articles ``start`` to ``start + size`` of a query: one page, one search round trip.
+
+    pymed's ``query`` has no offset, so later pages select their ids with
+    esearch's ``retstart`` and fetch only those.
+    """
+    if not start:
+        return client.query(query, max_results=size)
+    if hasattr(client, "_getArticles"):
+        parameters = dict(client.parameters, term=query, retmax=size, retstart=start)
+        ids = client._get(url="/entrez/eutils/esearch.fcgi", parameters=parameters)["esearchresult"]["idlist"]
+        return client._getArticles(article_ids=ids) if ids else []
+    return client.query(query, max_results=size, start=start)
+
+
+def article_to_record(article):
+    """Flattens a pymed article into the plain dict rendered by the app."""
+    date = article.publication_date
+    pmid = (article.pubmed_id or "").split("\n")[0].strip()
+    return {
+        "PMID": pmid,
+        "Titel": article.title or "",
+        "Abstract": article.abstract or "",
+        "Date": date.isoformat() if hasattr(date, "isoformat") else str(date or ""),
+    }
+
+
+# --- OFFLINE STAND-IN ---
+class FakeArticle:
+    def __init__(self, pubmed_id, title, abstract, publication_date):
+        self.pubmed_id = pubmed_id
+        self.title = title
+        self.abstract = abstract
+        self.publication_date = publication_date
+
+
+# Publication-date range appended to a query, as written by digest.since_query.
+_DATE_RANGE = re.compile(r'^\((.*)\) AND \("(\d{4}/\d{2}/\d{2})"\[PDAT\] : "[^"]*"\[PDAT\]\)$', re.S)
+
+
+class FakePubMed:
+    """Deterministic, network-free PubMed replacement.
+
+    The same query always yields the same articles, newest first, so cache and
+    index behaviour can be checked offline. A ``[PDAT]`` lower bound on the
+    query keeps only articles published on or after that date. ``latency`` (seconds) is slept once
+    per ``query`` call to mimic NCBI round trips; ``fail_rate`` makes that
+    fraction of calls raise, which exercises retry paths.
+    """
+
+    def __init__(self, latency=0.0, fail_rate=0.0, total_results=500,
+                 newest=datetime.date(2026, 6, 30)):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.total_results = total_results
+        self.newest = newest
+        self.calls = 0
+
+    def _seed(self, query):
+        return int(hashlib.sha1(query.encode("utf-8")).hexdigest()[:8], 16)
+
+    def article(self, query, index):
+        seed = self._seed(query)
+        pmid = str(30000000 + (seed + index * 7919) % 9000000)
+        topic = query.strip() or "kidney transplantation"
+        return FakeArticle(
+            pubmed_id=pmid,
+            title=f"{topic.title()}: study {index + 1}",
+            abstract=(f"Background: {topic} in kidney transplant recipients. "
+                      f"Methods: cohort {seed % 97 + index}. "
+                      f"Results: outcomes of {topic} were reported."),
+            publication_date=self.newest - datetime.timedelta(days=3 * index + seed % 3),
+        )
+
+    def query(self, query, max_results=100, start=0):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_rate and (self._seed(query) + self.calls) % 100 < self.fail_rate * 100:
+            raise ConnectionError("FakePubMed: simulated NCBI failure")
+        since = None
+        date_range = _DATE_RANGE.match(query)
+        if date_range:
+            query, since = date_range.group(1), datetime.datetime.strptime(date_range.group(2), "%Y/%m/%d").date()
+        stop = min(start + max_results, self.total_results)
+        articles = (self.article(query, i) for i in range(start, stop))
+        if since is not None:
+            articles = itertools.takewhile(lambda a: a.publication_date >= since, articles)
+        return articles
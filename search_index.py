@@ -0,0 +1,165 @@
+"""Local full-text index over every article the app has fetched.
+
+Articles are stored in SQLite with an FTS5 index ranked by BM25 (title
+weighted above abstract). Text is folded (umlauts, accents) and run through a
+light German/English suffix stemmer before indexing, and queries go through
+the same pipeline, so "Transplantationen", "transplantation" and
+"transplanted" meet at one stem. Queries support ``"exact phrases"``,
+``prefix*`` terms and plain words (all must match).
+"""
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+DEFAULT_DIR = os.environ.get("NTX_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".ntx_cache"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    pmid TEXT UNIQUE NOT NULL,
+    title TEXT NOT NULL,
+    abstract TEXT NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, abstract, content='', tokenize='unicode61'
+);
+"""
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+
+# Longest suffix first; each pass strips at most one, two passes in total.
+_SUFFIXES = (
+    # English
+    "ational", "ations", "ation", "ments", "ment", "ings", "ing", "ness", "ies", "ly", "ed",
+    # German
+    "ungen", "heiten", "keiten", "ung", "heit", "keit", "lich", "isch", "ern", "em", "er", "en", "es", "nd",
+    # shared
+    "e", "s",
+)
+_SUFFIXES = tuple(sorted(set(_SUFFIXES), key=len, reverse=True))
+_MIN_STEM = 4
+
+
+def fold(text):
+    """Lowercases and strips diacritics; German ß becomes ss."""
+    text = text.lower().replace("ß", "ss")
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def stem(word):
+    """Light German/English suffix stripping on an already folded word."""
+    for _ in range(2):
+        for suffix in _SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM:
+                word = word[:-len(suffix)]
+                break
+        else:
+            break
+    return word
+
+
+def analyze(text):
+    """Text -> list of stems, as stored in the index."""
+    return [stem(w) for w in _WORD.findall(fold(text or ""))]
+
+
+def compile_query(query):
+    """Turns a user query into an FTS5 MATCH expression (or None if empty).
+
+    ``"a b"`` becomes a phrase over the stems of a and b, ``word*`` a prefix
+    match on the folded (unstemmed) word, anything else a stemmed term.
+    """
+    parts = []
+    for phrase, word in _QUERY_TOKEN.findall(query or ""):
+        if phrase:
+            stems = analyze(phrase)
+            if stems:
+                parts.append('"' + " ".join(stems) + '"')
+        elif word.endswith("*"):
+            folded = _WORD.findall(fold(word[:-1]))
+            if folded:
+                parts.extend(f'"{w}"' for w in folded[:-1])
+                parts.append(f'"{stem(folded[-1]) if len(folded[-1]) > _MIN_STEM else folded[-1]}" *')
+        else:
+            parts.extend(f'"{s}"' for s in analyze(word))
+    return " AND ".join(parts) or None
+
+
+class SearchIndex:
+    def __init__(self, path=None):
+        if path is None:
+            os.makedirs(DEFAULT_DIR, exist_ok=True)
+            path = os.path.join(DEFAULT_DIR, "search.sqlite")
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, records):
+        """Inserts or updates article records (dicts with PMID/Titel/Abstract/Date).
+
+        Returns the number of articles that were new to the index.
+        """
+        conn = self._connect()
+        added = 0
+        with self._lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for r in records:
+                    pmid = r.get("PMID")
+                    if not pmid:
+                        continue
+                    title, abstract, date = r.get("Titel") or "", r.get("Abstract") or "", r.get("Date") or ""
+                    row = conn.execute("SELECT id, title, abstract FROM articles WHERE pmid = ?", (pmid,)).fetchone()
+                    if row is not None:
+                        if (row[1], row[2]) == (title, abstract):
+                            continue
+                        # Contentless FTS5 tables are updated by replaying the old tokens as a delete.
+                        conn.execute("INSERT INTO articles_fts (articles_fts, rowid, title, abstract) VALUES ('delete', ?, ?, ?)",
+                                     (row[0], " ".join(analyze(row[1])), " ".join(analyze(row[2]))))
+                        conn.execute("UPDATE articles SET title = ?, abstract = ?, date = ? WHERE id = ?",
+                                     (title, abstract, date, row[0]))
+                        rowid = row[0]
+                    else:
+                        rowid = conn.execute("INSERT INTO articles (pmid, title, abstract, date) VALUES (?, ?, ?, ?)",
+                                             (pmid, title, abstract, date)).lastrowid
+                        added += 1
+                    conn.execute("INSERT INTO articles_fts (rowid, title, abstract) VALUES (?, ?, ?)",
+                                 (rowid, " ".join(analyze(title)), " ".join(analyze(abstract))))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def search(self, query, limit=20, offset=0):
+        """BM25-ranked records matching ``query``; [] for empty or invalid queries."""
+        expr = compile_query(query)
+        if expr is None:
+            return []
+        try:
+            rows = self._connect().execute(
+                "SELECT a.pmid, a.title, a.abstract, a.date FROM articles_fts "
+                "JOIN articles a ON a.id = articles_fts.rowid "
+                "WHERE articles_fts MATCH ? ORDER BY bm25(articles_fts, 10.0, 1.0) LIMIT ? OFFSET ?",
+                (expr, limit, offset),
+            ).fetchall()
+        except sqlite3.OperationalError:
+            return []
+        return [{"PMID": p, "Titel": ti, "Abstract": ab, "Date": d} for p, ti, ab, d in rows]
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
@@ -0,0 +1,108 @@
+"""Lazy imports and cold-start measurement.
+
+Heavy dependencies are bound through ``LazyModule`` so a worker only pays for
+the libraries of the pages it actually renders: pandas for the tables, pymed
+for Search, matplotlib for Follow-Up, graphviz for the RDN/RAKT workflows.
+
+    python startup.py                 # per-module import cost + first Dashboard render
+    python startup.py --budget-ms 3000  # exit 1 if the cold Dashboard render is slower
+
+Running the app with ``NTX_PROFILE_STARTUP=1`` also shows script time and the
+heavy modules loaded so far in the sidebar.
+"""
+import argparse
+import importlib
+import json
+import os
+import re
+import subprocess
+import sys
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "KidneyTx.py")
+HEAVY_MODULES = ["streamlit", "pandas", "numpy", "pymed", "matplotlib", "graphviz"]
+PROFILE = os.environ.get("NTX_PROFILE_STARTUP", "") not in ("", "0")
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def loaded_heavy_modules():
+    return [m for m in HEAVY_MODULES if m in sys.modules]
+
+
+# --- MEASUREMENT (each probe runs in a fresh interpreter, i.e. a cold start) ---
+_IMPORTTIME = re.compile(r"import time:\s*(\d+)\s*\|\s*(\d+)\s*\|\s*(\S.*)$")
+
+_FIRST_RENDER = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+t2 = time.perf_counter()
+print(json.dumps({"streamlit_ms": (t1 - t0) * 1e3, "script_ms": (t2 - t1) * 1e3, "total_ms": (t2 - t0) * 1e3,
+                  "errors": [str(e.value) for e in at.exception],
+                  "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def import_cost_ms(module):
+    """Cumulative cold import time of ``module`` in ms (None if not installed)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME.search(line)
+        if match and match.group(3).strip() == module:
+            return int(match.group(2)) / 1e3
+    return None
+
+
+def first_render(app=APP):
+    """Cold-process timing of the first (Dashboard) run of the app."""
+    env = dict(os.environ, NTX_PUBMED=os.environ.get("NTX_PUBMED", "fake"))
+    proc = subprocess.run([sys.executable, "-c", _FIRST_RENDER, app], capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "first render failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if the cold Dashboard render exceeds this")
+    parser.add_argument("--json", action="store_true", help="print machine-readable output")
+    args = parser.parse_args(argv)
+
+    costs = {m: import_cost_ms(m) for m in HEAVY_MODULES}
+    render = first_render()
+    over_budget = args.budget_ms is not None and render["total_ms"] > args.budget_ms
+
+    if args.json:
+        print(json.dumps({"import_ms": costs, "first_render": render, "budget_ms": args.budget_ms}, indent=2))
+    else:
+        print("Cold import cost (cumulative):")
+        for module, ms in costs.items():
+            print(f"  {module:<12} {'not installed' if ms is None else f'{ms:8.1f} ms'}")
+        print(f"First Dashboard render: {render['total_ms']:.1f} ms "
+              f"(streamlit {render['streamlit_ms']:.1f} ms + script {render['script_ms']:.1f} ms)")
+        print(f"Heavy modules loaded by the Dashboard: {', '.join(render['loaded']) or 'none'}")
+        if render["errors"]:
+            print(f"Errors: {render['errors']}")
+        if args.budget_ms is not None:
+            print(f"Budget {args.budget_ms:.0f} ms: {'EXCEEDED' if over_budget else 'ok'}")
+    return 1 if over_budget or render["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
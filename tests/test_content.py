@@ -0,0 +1,20 @@
+from content import ContentStore
+
+
+def test_edits_to_a_table_do_not_reach_other_sessions():
+    store = ContentStore()
+    table_id = store.tables()[0]
+    frame = store.get(table_id, "English")
+    original = frame.iloc[0, 0]
+    frame.iloc[0, 0] = "edited"
+    frame["added"] = 1
+
+    fresh = store.get(table_id, "English")
+    assert fresh.iloc[0, 0] == original
+    assert "added" not in fresh
+
+
+def test_unknown_language_falls_back_to_english():
+    store = ContentStore()
+    table_id = store.tables()[0]
+    assert store.get(table_id, "Klingon").equals(store.get(table_id, "English"))
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from crossmatch import AntigenTable, CrossmatchEngine, ReferencePanel, load_panel, synthetic_candidates, synthetic_panel
+
+
+@pytest.fixture(scope="module")
+def table():
+    return AntigenTable()
+
+
+@pytest.fixture(scope="module")
+def panel(table):
+    return ReferencePanel(synthetic_panel(500, table, seed=1), table)
+
+
+def test_broad_antigens_expand_to_their_splits(table):
+    assert table.decode(table.encode("hla-a9 c7, DR2")) == ["A24", "A23", "Cw7", "DR15", "DR16"]
+    assert table.decode(table.encode("A23 A24")) == table.decode(table.encode("A9"))
+
+
+def test_unknown_antigen_is_rejected(table):
+    with pytest.raises(ValueError):
+        table.bits("A999")
+
+
+def test_cpra_matches_brute_force(table, panel):
+    carriers = synthetic_panel(500, table, seed=1)
+    chunk = synthetic_candidates(300, sensitized=0.8, table=table, seed=2)
+    unacceptable = table.matrix(chunk["unacceptable"])
+
+    expected = (carriers.astype(int) @ unacceptable.T.astype(int) > 0).mean(axis=0) * 100
+    np.testing.assert_allclose(panel.cpra(table.pack(unacceptable)), expected, atol=1e-3)
+
+
+def test_update_last_row_wins_and_counts_only_changes(table, panel):
+    engine = CrossmatchEngine(table, panel, capacity=2)
+    first = pd.DataFrame({"patient_id": [1, 2, 1], "unacceptable": ["A2", "B7", "A1"]})
+    assert engine.update(first) == 2
+    assert engine.crossmatch("A1 B8").tolist() == [True, False]
+    assert engine.crossmatch("A2 B8").tolist() == [False, False]
+
+    again = pd.DataFrame({"patient_id": [2, 1, 3], "unacceptable": ["B7", "A1", ""]})
+    assert engine.update(again) == 1
+    assert engine.patients == 3
+
+
+def test_negative_and_remove(table, panel):
+    engine = CrossmatchEngine(table, panel)
+    engine.update(pd.DataFrame({"patient_id": ["a", "b", "c"], "unacceptable": ["A2", "A1 B8", ""]}))
+
+    negative = engine.negative("A2 B7")
+    assert negative["patient_id"].tolist() == ["b", "c"]
+    assert negative["cpra"].dtype == np.float64
+    assert negative["cpra"].iloc[-1] == 0
+
+    assert engine.remove(["b", "unknown"]) == 1
+    assert engine.negative("A2 B7")["patient_id"].tolist() == ["c"]
+
+
+def test_empty_panel_file_is_rejected(tmp_path, table):
+    path = tmp_path / "panel.csv"
+    path.write_text("typing\n")
+    with pytest.raises(ValueError, match="no donor typings"):
+        load_panel(str(path), table)
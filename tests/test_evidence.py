@@ -0,0 +1,16 @@
+from evidence import EvidenceStore
+from i18n import messages
+
+
+def test_language_index_follows_the_catalogs():
+    store = EvidenceStore()
+    for code in ("de", "en", "es", "fr"):
+        translated = {m[len("evidence."):] for m in messages(code) if m.startswith("evidence.")}
+        assert store.query(lang=code) == sorted(translated & set(store.entries))
+
+
+def test_upsert_of_an_untranslated_entry():
+    store = EvidenceStore()
+    store.upsert("new_trial", {"Evidenz": "Level 2b", "Quelle": "Example Trial", "Topics": ["rejection"]})
+    assert store.query(source="example") == ["new_trial"]
+    assert "new_trial" not in store.query(lang="English")
@@ -0,0 +1,40 @@
+from evidence_refresh import TokenBucket, metered, refresh_evidence
+from pubmed_client import FakePubMed
+
+
+class PagedClient:
+    """pymed-shaped client: one esearch plus one efetch per query."""
+
+    def __init__(self):
+        self.parameters = {}
+
+    def _get(self, url, parameters=None):
+        return {"esearchresult": {"idlist": []}}
+
+    def query(self, query, max_results=100):
+        self._get(url="/entrez/eutils/esearch.fcgi")
+        self._get(url="/entrez/eutils/efetch.fcgi")
+        return []
+
+
+def test_metered_client_is_charged_per_http_request():
+    bucket = TokenBucket(rate=1000)
+    metered(PagedClient(), bucket).query("tacrolimus")
+    assert bucket.acquired == 2
+
+
+def test_report_counts_requests_and_attempts_separately():
+    evidence = {"a": {"Query": "tacrolimus"}, "b": {"Query": "belatacept"}, "c": {}}
+    articles, report = refresh_evidence(evidence, client_factory=PagedClient, rate=1000)
+    assert sorted(articles) == ["a", "b"]
+    assert report["attempts"] == 2
+    assert report["requests"] == 4
+    assert report["throughput_rps"] > 0
+
+
+def test_failed_attempts_are_retried_and_counted():
+    fake = FakePubMed(fail_rate=1.0)
+    _, report = refresh_evidence({"a": {"Query": "tacrolimus"}}, client_factory=lambda: fake, rate=1000,
+                                 retries=2, backoff=0)
+    assert report["keys"]["a"]["attempts"] == 3 and report["requests"] == 3
+    assert report["errors"] == 1
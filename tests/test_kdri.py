@@ -0,0 +1,70 @@
+import math
+
+import pytest
+
+from kdri import HMP, MISSING, SCS, KdriModel
+
+REFERENCE = {"age": 40, "height_cm": 170, "weight_kg": 80, "creatinine": 1.0,
+             "hypertension": 0, "diabetes": 0, "cva": 0, "hcv": 0, "dcd": 0}
+
+
+@pytest.fixture(scope="module")
+def model():
+    return KdriModel()
+
+
+def donor(**changes):
+    return {**REFERENCE, **changes}
+
+
+def test_reference_donor_has_unit_kdri_rao(model):
+    result = model.score_one(donor())
+    assert result["kdri_rao"] == pytest.approx(1.0)
+    assert result["kdri"] == pytest.approx(1 / 1.318253823684)
+    assert result["kdpi"] == 17
+    assert not result["ecd"] and result["storage"] == SCS
+
+
+def test_coefficients_of_an_older_marginal_donor(model):
+    result = model.score_one(donor(age=65, height_cm=165, weight_kg=70, creatinine=1.8,
+                                   hypertension=1, cva=1, dcd=1))
+    expected = math.exp(0.0128 * 25 + 0.0107 * 15 + 0.0464 * 0.5 + 0.0199 * 2 + 0.1260 + 0.0881
+                        + 0.2200 * 0.8 - 0.2090 * 0.3 + 0.1330)
+    assert result["kdri_rao"] == pytest.approx(expected)
+    assert result["kdpi"] == 98
+    assert result["ecd"] and result["storage"] == HMP
+
+
+def test_creatinine_is_capped(model):
+    assert model.score_one(donor(creatinine=12))["kdri_rao"] == pytest.approx(
+        model.score_one(donor(creatinine=8))["kdri_rao"])
+
+
+@pytest.mark.parametrize("changes, ecd", [
+    ({"age": 60}, True),
+    ({"age": 59, "hypertension": 1}, False),
+    ({"age": 50, "hypertension": 1, "cva": 1}, True),
+    ({"age": 55, "hypertension": 1, "creatinine": 1.6}, True),
+    ({"age": 55, "hypertension": 1, "creatinine": 1.5}, False),
+    ({"age": 49, "hypertension": 1, "cva": 1, "creatinine": 2.0}, False),
+])
+def test_ecd_definition(model, changes, ecd):
+    assert model.score_one(donor(**changes))["ecd"] == ecd
+
+
+@pytest.mark.parametrize("changes, storage", [
+    ({"age": 65, "creatinine": None}, HMP),
+    ({"age": 55, "hypertension": 1, "cva": 1, "creatinine": None}, HMP),
+    ({"age": 55, "hypertension": 1, "creatinine": None}, MISSING),
+    ({"age": 30, "creatinine": None}, MISSING),
+    ({"age": None}, MISSING),
+])
+def test_missing_values_only_leave_storage_open_when_undecided(model, changes, storage):
+    assert model.score_one(donor(**changes))["storage"] == storage
+
+
+def test_hmp_threshold_uses_the_displayed_kdpi(model):
+    # Unrounded KDPI 84.73: displayed as 85, so a non-ECD donor still gets HMP.
+    result = model.score_one(donor(age=45, height_cm=164, diabetes=1, hcv=1, dcd=1))
+    assert not result["ecd"]
+    assert result["kdpi"] == 85 and result["storage"] == HMP
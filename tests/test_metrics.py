@@ -0,0 +1,52 @@
+import socket
+import urllib.request
+
+import pytest
+
+import metrics
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def export_port(monkeypatch):
+    port = free_port()
+    monkeypatch.setattr(metrics, "EXPORT_PORT", port)
+    monkeypatch.setattr(metrics, "EXPORT_FILE", None)
+    monkeypatch.setattr(metrics, "_server", None)
+    yield port
+    if metrics._server:
+        metrics._server.shutdown()
+        metrics._server.server_close()
+
+
+def test_maybe_export_starts_the_endpoint_once(export_port):
+    metrics.maybe_export()
+    server = metrics._server
+    metrics.maybe_export()
+    assert metrics._server is server
+
+    metrics.inc("test_metrics_total")
+    with urllib.request.urlopen(f"http://127.0.0.1:{export_port}/metrics", timeout=5) as response:
+        assert "test_metrics_total" in response.read().decode("utf-8")
+
+
+def test_maybe_export_gives_up_when_the_port_is_taken(export_port):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", export_port))
+        sock.listen()
+        metrics.maybe_export()
+        metrics.maybe_export()
+    assert metrics._server is False
+
+
+def test_timer_keeps_the_function_name():
+    @metrics.timer("test_seconds")
+    def scored():
+        return 1
+
+    assert scored.__name__ == "scored" and scored() == 1
@@ -0,0 +1,80 @@
+import time
+
+from pubmed_cache import PubMedCache
+from pubmed_client import FakePubMed, article_to_record
+
+
+def make_cache(tmp_path, fake, **kwargs):
+    return PubMedCache(path=str(tmp_path / "pubmed.sqlite"), client_factory=lambda: fake, **kwargs)
+
+
+def wait_for_refresh(cache, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while cache._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not cache._refreshing
+
+
+def test_fresh_entry_is_served_without_fetching(tmp_path):
+    fake = FakePubMed()
+    cache = make_cache(tmp_path, fake, ttl=60)
+    cache.put("tacrolimus", 3, [{"PMID": "1"}])
+    assert cache.get("  Tacrolimus ", 3) == [{"PMID": "1"}]
+    assert fake.calls == 0
+    assert cache.stats["hits"] == 1
+
+
+def test_stale_entry_is_served_and_refreshed_in_background(tmp_path):
+    fake = FakePubMed()
+    cache = make_cache(tmp_path, fake, ttl=60, stale_ttl=3600)
+    cache.put("tacrolimus", 3, [{"PMID": "old"}], fetched_at=time.time() - 120)
+
+    assert cache.get("tacrolimus", 3) == [{"PMID": "old"}]
+    assert cache.stats["stale_hits"] == 1
+    wait_for_refresh(cache)
+
+    fresh = [article_to_record(a) for a in FakePubMed().query("tacrolimus", max_results=3)]
+    assert fake.calls == 1
+    assert cache.get("tacrolimus", 3) == fresh
+    assert cache.stats["hits"] == 1
+
+
+def test_expired_entry_is_fetched_synchronously(tmp_path):
+    fake = FakePubMed()
+    cache = make_cache(tmp_path, fake, ttl=60, stale_ttl=60)
+    cache.put("tacrolimus", 3, [{"PMID": "old"}], fetched_at=time.time() - 600)
+
+    records = cache.get("tacrolimus", 3)
+    assert fake.calls == 1
+    assert len(records) == 3 and records[0]["PMID"] != "old"
+    assert cache.stats["misses"] == 1
+
+
+def test_failed_fetch_falls_back_to_expired_entry(tmp_path):
+    cache = PubMedCache(path=str(tmp_path / "pubmed.sqlite"), ttl=60, stale_ttl=60,
+                        client_factory=lambda: FakePubMed(fail_rate=1.0))
+    cache.put("tacrolimus", 3, [{"PMID": "old"}], fetched_at=time.time() - 600)
+    assert cache.get("tacrolimus", 3) == [{"PMID": "old"}]
+    assert cache.stats["errors"] == 1
+
+
+def test_stream_pages_from_an_unaligned_cursor(tmp_path):
+    fake = FakePubMed(total_results=40)
+    cache = make_cache(tmp_path, fake)
+    expected = [fake.article("belatacept", i).pubmed_id for i in range(15, 27)]
+
+    pmids = [r["PMID"] for r in cache.stream("belatacept", start=15, limit=12, page_size=10)]
+    assert pmids == expected
+    wait_for_refresh(cache)
+
+    # The pages now come from the cache, including the prefetched one.
+    misses = cache.stats["misses"]
+    assert [r["PMID"] for r in cache.stream("belatacept", start=20, limit=20, page_size=10)] == \
+        [fake.article("belatacept", i).pubmed_id for i in range(20, 40)]
+    assert cache.stats["misses"] == misses
+
+
+def test_stream_stops_at_the_end_of_the_results(tmp_path):
+    cache = make_cache(tmp_path, FakePubMed(total_results=23))
+    records = list(cache.stream("belatacept", start=5, page_size=10))
+    assert len(records) == 18
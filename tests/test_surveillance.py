@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from surveillance import SurveillanceEngine, patient_series
+
+
+def labs(values, analyte="creatinine", patient="p1", start="2026-01-01"):
+    return pd.DataFrame({
+        "patient_id": patient,
+        "taken_at": pd.date_range(start, periods=len(values), freq="7D").strftime("%Y-%m-%d"),
+        "analyte": analyte,
+        "value": values,
+    })
+
+
+def test_creatinine_rise_flagged():
+    events = SurveillanceEngine().ingest(labs([1.0, 1.0, 1.0, 2.0]))
+    assert events["kind"].tolist() == ["creatinine_rise"]
+
+
+def test_blank_first_value_does_not_poison_baseline():
+    engine = SurveillanceEngine()
+    events = engine.ingest(labs([float("nan"), 1.0, 1.0, 1.0, 2.0, 2.5]))
+    assert events["kind"].tolist() == ["creatinine_rise"]
+    assert engine.invalid == 1
+    assert engine.snapshot()["creatinine_baseline"].iloc[0] == 1.0
+
+
+def test_blank_value_and_date_are_skipped():
+    chunk = labs([1.0, 1.0, 1.0, 2.0])
+    chunk.loc[1, "taken_at"] = ""
+    chunk.loc[2, "value"] = None
+    engine = SurveillanceEngine()
+    engine.ingest(chunk)
+    assert engine.invalid == 2
+    assert engine.rows == 4
+
+
+def test_lab_data_without_required_columns_is_rejected():
+    with pytest.raises(ValueError, match="analyte"):
+        SurveillanceEngine().ingest(labs([1.0]).drop(columns="analyte"))
+
+
+def test_patient_series_skips_blank_rows(tmp_path):
+    chunk = pd.concat([labs([1.0, 1.2, 1.1]), labs([0.3], analyte="dd_cfdna", patient="p2")])
+    chunk.iloc[1, chunk.columns.get_loc("value")] = float("nan")
+    path = tmp_path / "labs.csv"
+    chunk.to_csv(path, index=False)
+    series = patient_series(str(path), "p1")
+    assert series["creatinine"].tolist() == [1.0, 1.1]
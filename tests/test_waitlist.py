@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import waitlist
+
+AS_OF = "2026-10-01"
+AGE_RULE = {"id": "screening", "months": 24, "age_months": [[50, 12]]}
+
+
+def test_unknown_age_gets_the_strictest_interval():
+    months = waitlist.validity_months(AGE_RULE, np.array([40.0, 55.0, np.nan]), np.zeros(3, dtype=bool))
+    assert months.tolist() == [24, 12, 12]
+
+
+def test_unreadable_birth_date_counts_as_unknown_age():
+    cohort = pd.DataFrame({"patient_id": [1, 2], "birth_date": ["1986-01-01", "not a date"],
+                           "screening": ["2025-01-15", "2025-01-15"]})
+    result = waitlist.evaluate(cohort, AS_OF, rules=[AGE_RULE])
+    assert result["screening_status"].tolist() == [waitlist.OK, waitlist.EXPIRED]
+
+
+def test_cancer_screening_follows_the_workup_table():
+    rule = next(r for r in waitlist.load_rules() if r["id"] == "cancer_screening")
+    months = waitlist.validity_months(rule, np.array([30.0, 70.0, np.nan]), np.zeros(3, dtype=bool))
+    assert months.tolist() == [12, 12, 12]
+
+
+def test_missing_exam_column_counts_as_missing():
+    result = waitlist.evaluate(pd.DataFrame({"patient_id": [1], "age": [40]}), AS_OF, rules=[AGE_RULE])
+    assert result["screening_status"].tolist() == [waitlist.MISSING]
+    assert result["nt"].tolist() == [True]
+
+
+@pytest.mark.parametrize("columns", [{"age": [40]}, {"patient_id": [1], "screening": ["2026-01-01"]}])
+def test_cohort_without_required_columns_is_rejected(columns):
+    with pytest.raises(ValueError, match="patient_id column and an age or birth_date"):
+        waitlist.evaluate(pd.DataFrame(columns), AS_OF, rules=[AGE_RULE])
@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+
+import warnecke
+
+
+@pytest.fixture(scope="module")
+def table():
+    return warnecke.RuleTable()
+
+
+def test_stage_specific_waiting_times(table):
+    cohort = pd.DataFrame({"candidate_id": [1, 2, 3, 4, 5],
+                           "entity": ["bladder_invasive", "bladder_invasive", "bladder_invasive", "rcc_symptomatic", "other"],
+                           "stage": ["i", "III", "IV", None, "I"],
+                           "treatment_date": ["2024-01-15", "2024-01-15", "2024-01-15", None, "2020-01-01"]})
+    result = warnecke.evaluate(cohort, "2026-10-01", table)
+    assert result["wait_months"].tolist()[:2] == [24, 60]
+    assert result["status"].tolist() == [warnecke.ELIGIBLE, warnecke.WAITING, warnecke.REVIEW,
+                                         warnecke.MISSING, warnecke.REVIEW]
+
+
+@pytest.mark.parametrize("column", warnecke.REQUIRED_COLUMNS)
+def test_candidates_without_required_columns_are_rejected(table, column):
+    cohort = pd.DataFrame({"candidate_id": [1], "entity": ["rcc_incidental"], "treatment_date": ["2026-01-01"]})
+    with pytest.raises(ValueError, match=column):
+        warnecke.evaluate(cohort.drop(columns=column), "2026-10-01", table)
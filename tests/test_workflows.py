@@ -0,0 +1,13 @@
+from workflows import DONOR_WORKFLOW, spec_hash, workflow_svg
+
+
+def test_fallback_languages_share_the_english_layout():
+    english = spec_hash(DONOR_WORKFLOW, "English")
+    assert spec_hash(DONOR_WORKFLOW, "Español") == english
+    assert spec_hash(DONOR_WORKFLOW, "Français") == english
+    assert spec_hash(DONOR_WORKFLOW, "Deutsch") != english
+
+
+def test_fallback_language_reuses_the_cached_svg(tmp_path):
+    english = workflow_svg(DONOR_WORKFLOW, "English", cache_dir=str(tmp_path))
+    assert workflow_svg(DONOR_WORKFLOW, "Français", cache_dir=str(tmp_path)) is english
@@ -0,0 +1,180 @@
+"""Batch evaluator for the Warnecke oncological waiting-time criteria.
+
+The Warnecke table as a rule set (``content/warnecke_rules.json``): each tumor
+entity has a waiting time in months after curative treatment, optionally per
+stage. A stage mapped to ``null`` (e.g. metastatic disease) has no standard
+waiting time and needs an individual decision, as do unknown entities;
+``review`` entities ("more than 5 years") need one even after the wait.
+An unknown or missing stage falls back to the entity's (conservative)
+``months``.
+
+The rules are compiled into an entity x stage lookup table, so a cohort is
+evaluated with two hash-index lookups, one fancy-indexing step and the
+calendar-month arithmetic from ``waitlist``; there is no per-row Python.
+
+    python warnecke.py candidates.csv --as-of 2026-10-01
+    python warnecke.py --bench 1000000 --budget-s 5
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from startup import LazyModule
+from waitlist import add_months, read_chunks
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+DEFAULT_RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content", "warnecke_rules.json")
+
+ELIGIBLE, WAITING, REVIEW, MISSING = 0, 1, 2, 3
+STATUS_NAMES = {ELIGIBLE: "eligible", WAITING: "waiting", REVIEW: "review", MISSING: "missing"}
+REQUIRED_COLUMNS = ("candidate_id", "entity", "treatment_date")
+
+
+def load_rules(path=DEFAULT_RULES):
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+class RuleTable:
+    """Rules compiled into arrays; index -1 (unknown entity / stage) hits the last row / column."""
+
+    def __init__(self, rules=None):
+        rules = load_rules() if rules is None else rules
+        self.entities = [e["id"] for e in rules["entities"]]
+        self.stages = list(rules["stages"])
+        self.labels = {e["id"]: e["label"] for e in rules["entities"]}
+        months = np.full((len(self.entities) + 1, len(self.stages) + 1), np.nan)
+        review = np.ones(len(self.entities) + 1, dtype=bool)
+        for i, entity in enumerate(rules["entities"]):
+            months[i, :] = entity["months"]
+            for stage, stage_months in entity.get("stages", {}).items():
+                months[i, self.stages.index(stage)] = np.nan if stage_months is None else stage_months
+            review[i] = entity.get("review", False)
+        self.months = months
+        self.review = review
+        self._entity_index = pd.Index(self.entities)
+        self._stage_index = pd.Index(self.stages)
+
+    def lookup(self, entity, stage=None):
+        """Waiting months (NaN = individual decision) and review flags for arrays of entity ids and stages."""
+        e = self._entity_index.get_indexer(entity)
+        if stage is None:
+            s = np.full(len(e), -1)
+        else:
+            s = self._stage_index.get_indexer(pd.Series(stage, dtype="string").str.strip().str.upper())
+        return self.months[e, s], self.review[e]
+
+
+def evaluate(chunk, as_of, table=None):
+    """Earliest listing date and eligibility for every candidate.
+
+    Returns a DataFrame with ``candidate_id``, ``wait_months``,
+    ``earliest_listing`` (NaT if no standard wait applies) and ``status``
+    (ELIGIBLE/WAITING/REVIEW/MISSING codes). Raises ValueError if
+    ``candidate_id``, ``entity`` or ``treatment_date`` is absent.
+    """
+    absent = [c for c in REQUIRED_COLUMNS if c not in chunk]
+    if absent:
+        raise ValueError(f"candidate data lacks the columns {absent}")
+    table = RuleTable() if table is None else table
+    as_of = np.datetime64(as_of, "D")
+    n = len(chunk)
+    months, review = table.lookup(chunk["entity"], chunk["stage"] if "stage" in chunk else None)
+    treated = pd.to_datetime(chunk["treatment_date"], errors="coerce", format="ISO8601").to_numpy().astype("datetime64[D]")
+    missing = np.isnat(treated)
+    standard = ~np.isnan(months)
+
+    earliest = np.full(n, np.datetime64("NaT"), dtype="datetime64[D]")
+    timed = standard & ~missing
+    earliest[timed] = add_months(treated[timed], months[timed].astype(np.int64))
+
+    status = np.full(n, WAITING, dtype=np.int8)
+    status[timed & (earliest <= as_of)] = ELIGIBLE
+    status[timed & (earliest <= as_of) & review] = REVIEW
+    status[~standard] = REVIEW
+    status[missing & standard] = MISSING
+    return pd.DataFrame({"candidate_id": chunk["candidate_id"].to_numpy(), "wait_months": months,
+                         "earliest_listing": earliest, "status": status})
+
+
+def summarize(result, summary=None):
+    if summary is None:
+        summary = {"candidates": 0, **{name: 0 for name in STATUS_NAMES.values()}}
+    summary["candidates"] += len(result)
+    counts = np.bincount(result["status"].to_numpy(), minlength=len(STATUS_NAMES))
+    for code, name in STATUS_NAMES.items():
+        summary[name] += int(counts[code])
+    return summary
+
+
+def evaluate_file(path, as_of, table=None, chunksize=250_000, output=None):
+    """Streams a CSV/Parquet cohort through ``evaluate``; see ``waitlist.evaluate_file``."""
+    table = RuleTable() if table is None else table
+    summary = summarize(pd.DataFrame({"status": np.array([], dtype=np.int8)}))
+    for i, chunk in enumerate(read_chunks(path, chunksize)):
+        result = evaluate(chunk, as_of, table)
+        summary = summarize(result, summary)
+        if output:
+            result.to_csv(output, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    return summary
+
+
+# --- BENCHMARK ---
+def synthetic_cohort(n, as_of="2026-10-01", seed=0, table=None):
+    """Random candidates: known entities and stages (plus 1% unknown of each),
+    treated up to 8 years ago, 1% without a treatment date."""
+    table = RuleTable() if table is None else table
+    rng = np.random.default_rng(seed)
+    entities = np.array(table.entities + ["other"])[rng.integers(0, len(table.entities) + 1, n)]
+    stages = np.array(table.stages + ["unknown"], dtype=object)[rng.integers(0, len(table.stages) + 1, n)]
+    treated = (np.datetime64(as_of, "D") - rng.integers(0, 8 * 365, n).astype("timedelta64[D]")).astype("datetime64[ns]")
+    treated[rng.random(n) < 0.01] = np.datetime64("NaT")
+    return pd.DataFrame({"candidate_id": np.arange(n), "entity": entities, "stage": stages, "treatment_date": treated})
+
+
+def benchmark(n=1_000_000, as_of="2026-10-01", repeat=3):
+    """Best-of-``repeat`` wall time of ``evaluate`` on ``n`` in-memory candidates."""
+    table = RuleTable()
+    cohort = synthetic_cohort(n, as_of, table=table)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = evaluate(cohort, as_of, table)
+        timings.append(time.perf_counter() - started)
+    return {"candidates": n, "best_s": min(timings), "rows_per_s": n / min(timings), **summarize(result)}
+
+
+def format_summary(summary):
+    return f"{summary['candidates']} candidates: " + ", ".join(f"{summary[name]} {name}" for name in STATUS_NAMES.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warnecke criteria: earliest listing date and eligibility per candidate.")
+    parser.add_argument("cohort", nargs="?", help="CSV or Parquet file with candidate_id, entity, stage, treatment_date")
+    parser.add_argument("--as-of", default=str(np.datetime64("today", "D")))
+    parser.add_argument("--chunksize", type=int, default=250_000)
+    parser.add_argument("--output", help="write per-candidate results to this CSV")
+    parser.add_argument("--bench", type=int, metavar="N", help="benchmark with N synthetic candidates")
+    parser.add_argument("--budget-s", type=float, default=None, help="with --bench: fail if evaluation exceeds this")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        r = benchmark(args.bench)
+        print(f"{format_summary(r)}\nevaluated in {r['best_s']:.2f}s ({r['rows_per_s'] / 1e6:.1f}M rows/s)")
+        if args.budget_s is not None:
+            over_budget = r["best_s"] > args.budget_s
+            print(f"Budget {args.budget_s:.1f} s: {'EXCEEDED' if over_budget else 'ok'}")
+            return 1 if over_budget else 0
+        return 0
+    if not args.cohort:
+        parser.error("cohort file required (or --bench N)")
+    print(format_summary(evaluate_file(args.cohort, args.as_of, chunksize=args.chunksize, output=args.output)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
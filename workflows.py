@@ -0,0 +1,166 @@
+"""Declarative surgical workflow diagrams, compiled once to SVG.
+
+Each workflow is a plain spec (graph attributes, node defaults, nodes with
+DE/EN labels and optional highlight styles, edges). ``workflow_svg`` lays a
+spec out with Graphviz once per distinct set of labels and keeps the SVG bytes
+in memory and on disk, keyed by a hash of the DOT source, so every session
+and worker gets the same bytes without rebuilding the graph or laying it out
+in the browser.
+"""
+import hashlib
+import os
+import threading
+
+import metrics
+
+DEFAULT_DIR = os.environ.get("NTX_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".ntx_cache"))
+
+# Highlight styles shared by all diagrams.
+STYLES = {
+    "bolus": {"fillcolor": "#ff8a80", "style": "bold"},
+    "check": {"fillcolor": "#fff9c4"},
+    "cooling": {"fillcolor": "#b3e5fc"},
+}
+
+# --- WORKFLOW SPECS ---
+DONOR_WORKFLOW = {
+    "id": "rdn",
+    "comment": "RDN",
+    "graph": {"rankdir": "TB", "size": "8"},
+    "node": {"shape": "box", "style": "filled", "fillcolor": "#e8f5e9"},  # Green tint
+    "nodes": [
+        ("A", {"Deutsch": "1. Lagerung (60°)", "English": "1. Positioning (60°)"}, None),
+        ("B", {"Deutsch": "2. Präparation (Hilus)", "English": "2. Dissection (Hilus)"}, None),
+        ("C", "3. PHARMA BOLUS\n(Heparin/Mannitol)", "bolus"),
+        ("D", "4. ICG Check (Ureter)", "check"),
+        ("E", {"Deutsch": "5. Stapling (Arterie)", "English": "5. Stapling (Artery)"}, None),
+        ("F", {"Deutsch": "6. Extraktion (Pfannenstiel)", "English": "6. Extraction (Pfannenstiel)"}, None),
+    ],
+    "edges": [
+        ("A", "B", None),
+        ("B", "C", " 3-5 min vor/pre Clip"),
+        ("C", "D", None),
+        ("D", "E", " Safety View"),
+        ("E", "F", " Warm Ischemia Start"),
+    ],
+}
+
+RECIPIENT_WORKFLOW = {
+    "id": "rakt",
+    "comment": "RAKT",
+    "graph": {"rankdir": "TB", "size": "8"},
+    "node": {"shape": "box", "style": "filled", "fillcolor": "#e3f2fd"},  # Blue tint
+    "nodes": [
+        ("1", {"Deutsch": "1. Zugang", "English": "1. Access (Pfannenstiel)"}, None),
+        ("2", {"Deutsch": "2. Gefäß-Exposure", "English": "2. Vessel Exposure"}, None),
+        ("3", {"Deutsch": "3. Niere Andocken", "English": "3. Docking Kidney"}, None),
+        ("4", {"Deutsch": "4. Regionale Hypothermie", "English": "4. Regional Hypothermia"}, "cooling"),
+        ("5", {"Deutsch": "5. Anastomosen", "English": "5. Anastomosis"}, None),
+        ("6", "6. REPERFUSIONS-BOLUS", "bolus"),
+        ("7", {"Deutsch": "7. Freigabe & ICG", "English": "7. Unclamp & ICG"}, None),
+        ("8", {"Deutsch": "8. Ureter-Implantation", "English": "8. Ureter Reimplantation"}, None),
+    ],
+    "edges": [
+        ("1", "2", None),
+        ("2", "3", None),
+        ("3", "4", " Time critical"),
+        ("4", "5", None),
+        ("5", "6", " Pre-Unclamp"),
+        ("6", "7", None),
+        ("7", "8", None),
+    ],
+}
+
+WORKFLOWS = {spec["id"]: spec for spec in (DONOR_WORKFLOW, RECIPIENT_WORKFLOW)}
+
+
+# --- COMPILATION ---
+def _label(label, lang):
+    if isinstance(label, dict):
+        return label.get(lang) or label["English"]
+    return label
+
+
+def _quote(value):
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+
+def _attrs(attrs):
+    return " ".join(f"{k}={_quote(v)}" for k, v in attrs.items())
+
+
+def to_dot(spec, lang):
+    """DOT source for ``spec`` in ``lang`` ("Deutsch" / "English")."""
+    lines = [f"// {spec['comment']}", "digraph {"]
+    lines.append(f"\tgraph [{_attrs(spec['graph'])}]")
+    lines.append(f"\tnode [{_attrs(spec['node'])}]")
+    for node_id, label, style in spec["nodes"]:
+        attrs = {"label": _label(label, lang), **STYLES.get(style, {})}
+        lines.append(f"\t{_quote(node_id)} [{_attrs(attrs)}]")
+    for tail, head, label in spec["edges"]:
+        attrs = f" [{_attrs({'label': _label(label, lang)})}]" if label else ""
+        lines.append(f"\t{_quote(tail)} -> {_quote(head)}{attrs}")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def spec_hash(spec, lang):
+    """Hash of the DOT source, i.e. of the resolved labels: languages that fall
+    back to English share the English layout."""
+    return hashlib.sha256(to_dot(spec, lang).encode("utf-8")).hexdigest()[:16]
+
+
+_svg_cache = {}
+_svg_lock = threading.Lock()
+
+
+def workflow_svg(spec, lang, cache_dir=DEFAULT_DIR):
+    """SVG bytes for ``spec`` in ``lang``, or None when Graphviz is unavailable.
+
+    Looked up in memory first, then in ``cache_dir``; laid out at most once per
+    distinct DOT source.
+    """
+    key = spec_hash(spec, lang)
+    if key in _svg_cache:
+        metrics.inc("workflow_svg_total", result="memory")
+        return _svg_cache[key]
+    with _svg_lock:
+        if key in _svg_cache:
+            metrics.inc("workflow_svg_total", result="memory")
+            return _svg_cache[key]
+        path = os.path.join(cache_dir, "workflows", f"{spec['id']}-{key}.svg") if cache_dir else None
+        if path and os.path.exists(path):
+            with open(path, "rb") as fh:
+                svg = fh.read()
+            metrics.inc("workflow_svg_total", result="disk")
+        else:
+            try:
+                import graphviz
+                svg = graphviz.Source(to_dot(spec, lang)).pipe(format="svg")
+            except Exception as exc:
+                # No Python binding or no `dot` executable: remember that and let
+                # callers fall back to client-side layout.
+                metrics.error("workflow_layout", exc)
+                metrics.inc("workflow_svg_total", result="unavailable")
+                _svg_cache[key] = None
+                return None
+            metrics.inc("workflow_svg_total", result="layout")
+            if path:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as fh:
+                    fh.write(svg)
+                os.replace(tmp, path)
+        _svg_cache[key] = svg
+        return svg
+
+
+def precompile(langs=("Deutsch", "English")):
+    """Lays out every known workflow in every language (e.g. at deploy time)."""
+    return {(wf_id, lang): workflow_svg(spec, lang) is not None
+            for wf_id, spec in WORKFLOWS.items() for lang in langs}
+
+
+if __name__ == "__main__":
+    for (wf_id, lang), ok in precompile().items():
+        print(f"{wf_id:<6} {lang:<8} {'ok' if ok else 'graphviz unavailable'}")